@@ -0,0 +1,225 @@
+import asyncio
+import queue
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+
+# --- Asyncio request backend for the chatbot ---
+# One event loop per server process runs every Gemini call. Sessions submit
+# requests from their script threads and the loop multiplexes them over a
+# bounded client pool, a shared rate limit and retries with jittered backoff.
+# Only rate limits, server errors and timeouts are retried; anything else
+# (a bad key, an invalid request) fails at once. Identical requests that are
+# already in flight share one API call. Streamed replies go through the same
+# limit and pool and are handed to the script thread piece by piece.
+
+_STREAM_END = object()
+
+
+class RateLimitError(Exception):
+    """Raised by a client when the API answers 429 Too Many Requests."""
+
+
+def is_rate_limited(exc):
+    """
+    Checks whether an exception means the request was rate limited.
+    Covers RateLimitError and google.api_core's ResourceExhausted (HTTP 429).
+    """
+    if isinstance(exc, RateLimitError):
+        return True
+    return getattr(exc, "code", None) == 429 or type(exc).__name__ == "ResourceExhausted"
+
+
+def is_transient(exc):
+    """
+    Checks whether a failed call may succeed if sent again: rate limits, server
+    errors (HTTP 5xx, e.g. google.api_core's ServiceUnavailable) and timeouts
+    (including google.api_core's DeadlineExceeded).
+    """
+    if is_rate_limited(exc) or isinstance(exc, TimeoutError):
+        return True
+    code = getattr(exc, "code", None)
+    return (isinstance(code, int) and 500 <= code < 600) or type(exc).__name__ == "DeadlineExceeded"
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter.
+    Args:
+        rate (float): Tokens added per second (sustained requests per second).
+        capacity (int): Bucket size (largest burst allowed).
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = None
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ClientPool:
+    """
+    Bounded pool of API clients, created on demand up to `size`.
+    Args:
+        factory (callable): Returns a new client object.
+        size (int): Maximum number of clients (and concurrent requests).
+    """
+
+    def __init__(self, factory, size):
+        self.factory = factory
+        self.size = size
+        self.created = 0
+        self._idle = None
+
+    @asynccontextmanager
+    async def client(self):
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+        if self._idle.empty() and self.created < self.size:
+            client = self.factory()
+            self.created += 1  # Only once built, so a failing factory does not use up the pool
+        else:
+            client = await self._idle.get()
+        try:
+            yield client
+        finally:
+            self._idle.put_nowait(client)
+
+
+class AsyncBackend:
+    """
+    Concurrent Gemini request backend.
+    Args:
+        client_factory (callable): Builds a client with an async `generate_content_async(contents, stream=False)`.
+        pool_size (int): Maximum concurrent API calls.
+        rate (float): Sustained requests per second allowed by the limiter.
+        burst (int): Requests allowed in a burst above the sustained rate.
+        max_retries (int): Retries after a rate-limited, 5xx or timed-out call.
+        base_delay (float): First backoff delay in seconds, doubled on each retry.
+        max_delay (float): Upper bound for a single backoff delay.
+    """
+
+    def __init__(self, client_factory, pool_size=8, rate=5.0, burst=10,
+                 max_retries=4, base_delay=0.5, max_delay=8.0):
+        self.pool = ClientPool(client_factory, pool_size)
+        self.limiter = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = {"requests": 0, "api_calls": 0, "coalesced": 0, "retries": 0, "rate_limited": 0}
+        self._inflight = {}
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def backoff_delay(self, attempt):
+        """Full-jitter exponential backoff: uniform in [0, min(max_delay, base * 2**attempt)]."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def _call(self, contents, on_chunk=None):
+        """
+        Makes the API call, retrying transient failures. With `on_chunk` the reply
+        is streamed to it piece by piece, and a call that fails after its first
+        piece is not retried.
+        """
+        attempt = 0
+        while True:
+            await self.limiter.acquire()
+            streamed = False
+            try:
+                async with self.pool.client() as client:
+                    self.stats["api_calls"] += 1
+                    if on_chunk is None:
+                        response = await client.generate_content_async(contents)
+                        return response.text
+                    response = await client.generate_content_async(contents, stream=True)
+                    async for chunk in response:
+                        streamed = True
+                        on_chunk(chunk.text)
+                    return None
+            except Exception as exc:
+                if is_rate_limited(exc):
+                    self.stats["rate_limited"] += 1
+                if streamed or not is_transient(exc) or attempt >= self.max_retries:
+                    raise
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.backoff_delay(attempt))
+                attempt += 1
+
+    async def generate(self, contents, key=None):
+        """
+        Sends a request, sharing the call with any identical request already in flight.
+        Args:
+            contents: Prompt or conversation contents for the model.
+            key (str): Identity of the request for coalescing, e.g. the response cache key.
+        Returns:
+            str: The response text.
+        """
+        self.stats["requests"] += 1
+        if key is None:
+            return await self._call(contents)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(self._call(contents))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one caller giving up does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def generate_stream(self, contents, on_chunk):
+        """Sends a request and passes each piece of the reply to `on_chunk` as it arrives."""
+        self.stats["requests"] += 1
+        await self._call(contents, on_chunk)
+
+    # --- Bridge for synchronous callers (Streamlit script threads) ---
+
+    def start(self):
+        """Starts the backend's event loop in a daemon thread (once)."""
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                self._thread.start()
+        return self
+
+    def submit(self, contents, key=None):
+        """Schedules a request from any thread and returns a concurrent.futures.Future."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self.generate(contents, key), self._loop)
+
+    def generate_sync(self, contents, key=None, timeout=None):
+        return self.submit(contents, key).result(timeout)
+
+    def stream_sync(self, contents, timeout=None):
+        """
+        Streams a reply to a synchronous caller.
+        Yields:
+            str: The reply text, piece by piece as the event loop receives it.
+        """
+        self.start()
+        chunks = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(self.generate_stream(contents, chunks.put), self._loop)
+        future.add_done_callback(lambda _: chunks.put(_STREAM_END))
+        try:
+            while (chunk := chunks.get(timeout=timeout)) is not _STREAM_END:
+                yield chunk
+            future.result()  # Raises if the call failed
+        finally:
+            future.cancel()  # The reader stopped early, e.g. the script was rerun
@@ -0,0 +1,153 @@
+import argparse
+import os
+import tempfile
+import time
+import zipfile
+from collections import deque
+
+from PIL import Image
+
+from filter_chain import run_chain
+from filter_engine import BACKEND_NAMES, FILTER_NAMES, get_executor, normalize_mode
+from image_io import PeakRSS, render_png, spool
+
+# --- Batch processing: many images, one filter chain, one ZIP ---
+# Images stream through a process pool with a bounded number in flight, and
+# each result is written into the archive as soon as it is ready, so memory
+# use depends on the number of workers rather than the number of images.
+# Uploads are spooled to temporary files and workers write their results to
+# files too, so no image crosses a process boundary as bytes. All of those
+# live in one temporary directory that goes away with the batch, even if the
+# caller stops reading progress part way. PNG output is
+# rendered strip by strip (image_io.render_png); JPEG and WebP encoders need
+# the whole image.
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp")
+FORMAT_EXTENSIONS = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp"}
+
+
+def iter_folder(folder):
+    """Yields (archive name, path) for every image below `folder`, in a stable order."""
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for file_name in sorted(files):
+            if file_name.lower().endswith(IMAGE_EXTENSIONS):
+                path = os.path.join(root, file_name)
+                yield os.path.relpath(path, folder), path
+
+
+def process_image(path, chain, backend, image_format, directory=None):
+    """
+    Runs in a worker process: decodes, filters and encodes one image.
+    Args:
+        path (str): The source image file.
+        directory (str): Where to put the result. Defaults to the system temp directory.
+    Returns:
+        tuple: (path of a temporary file holding the encoded result, the worker's peak RSS in MB)
+    """
+    handle, output = tempfile.mkstemp(suffix=FORMAT_EXTENSIONS[image_format], dir=directory)
+    os.close(handle)
+    try:
+        with PeakRSS() as rss:
+            if image_format == "PNG":
+                render_png(path, chain, backend, output, workers=1)
+            else:
+                with Image.open(path) as image:
+                    image.load()
+                    result = run_chain(normalize_mode(image), chain, backend)
+                if image_format == "JPEG" and result.mode == "RGBA":
+                    result = result.convert("RGB")
+                result.save(output, format=image_format)
+    except Exception:
+        os.remove(output)
+        raise
+    return output, rss.peak_mb
+
+
+def process_batch(sources, chain, output, backend="PIL", image_format="PNG", workers=None):
+    """
+    Filters many images into a ZIP archive, yielding progress after each one.
+    Args:
+        sources (iterable): (name, path or file-like object) pairs. File-like
+            objects are spooled to temporary files, removed once processed.
+        chain (list): Filter names applied in order.
+        output (str or file): Where to write the ZIP.
+        backend (str): One of BACKEND_NAMES.
+        image_format (str): Output format, a key of FORMAT_EXTENSIONS.
+        workers (int): Worker processes. Defaults to the number of cores.
+    Yields:
+        dict: Progress for the image just written (or skipped on error).
+    """
+    workers = workers or os.cpu_count() or 1
+    executor = get_executor(workers)
+    extension = FORMAT_EXTENSIONS[image_format]
+    pending = deque()
+    done = 0
+    bytes_out = 0
+    peak_rss = 0.0
+    start = time.perf_counter()
+
+    def finish(name, future, spooled):
+        nonlocal done, bytes_out, peak_rss
+        error = None
+        try:
+            result, peak = future.result()
+        except Exception as exc:  # Unreadable or unsupported image: skip it and keep going
+            error = str(exc)
+        else:
+            archive.write(result, os.path.splitext(name)[0] + extension)
+            bytes_out += os.path.getsize(result)
+            peak_rss = max(peak_rss, peak)
+            os.remove(result)
+        finally:
+            if spooled:
+                os.remove(spooled)
+        done += 1
+        elapsed = time.perf_counter() - start
+        return {
+            "done": done,
+            "name": name,
+            "error": error,
+            "elapsed_s": elapsed,
+            "images_per_s": done / elapsed if elapsed else 0.0,
+            "mb_written": bytes_out / (1024 * 1024),
+            "peak_rss_mb": peak_rss,  # Highest worker peak for any image so far
+        }
+
+    # Images are already compressed, so the archive only stores them
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as work_dir, \
+            zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED) as archive:
+        try:
+            for name, source in sources:
+                spooled = None
+                if not isinstance(source, str):
+                    # Uploaded files cannot be sent to another process
+                    source = spooled = spool(source, work_dir)
+                future = executor.submit(process_image, source, chain, backend, image_format, work_dir)
+                pending.append((name, future, spooled))
+                # Keep at most two images per worker in flight
+                if len(pending) >= 2 * workers:
+                    yield finish(*pending.popleft())
+            while pending:
+                yield finish(*pending.popleft())
+        finally:
+            for _, future, _ in pending:  # Left over if the caller stopped early
+                future.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply a filter chain to a folder of images.")
+    parser.add_argument("folder")
+    parser.add_argument("output", help="ZIP file to write")
+    parser.add_argument("--filters", nargs="+", required=True, choices=FILTER_NAMES)
+    parser.add_argument("--backend", default="PIL", choices=BACKEND_NAMES)
+    parser.add_argument("--format", default="PNG", choices=list(FORMAT_EXTENSIONS))
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    sources = list(iter_folder(args.folder))
+    for progress in process_batch(sources, args.filters, args.output, args.backend, args.format, args.workers):
+        status = f"error: {progress['error']}" if progress["error"] else "ok"
+        print(f"[{progress['done']}/{len(sources)}] {progress['name']} {status} "
+              f"({progress['images_per_s']:.1f} images/s, peak RSS {progress['peak_rss_mb']:.0f} MB)")
+    print(f"Wrote {args.output}")
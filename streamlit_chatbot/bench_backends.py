@@ -0,0 +1,57 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from bench_filters import make_test_image
+from filter_engine import BACKEND_NAMES, FILTER_NAMES, apply_filter
+
+# --- PIL vs NumPy filter backends: correctness and speed ---
+# Runs every filter on both backends over a range of image sizes, reports the
+# largest per-pixel difference between them and the time each one takes.
+# Exits non-zero if the backends disagree by more than --tolerance levels.
+
+
+def best_time(function, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the PIL and NumPy filter backends.")
+    parser.add_argument("--sizes", default="64,256,1024,2048,4096", help="Comma-separated square edge lengths")
+    parser.add_argument("--modes", default="L,RGB,RGBA")
+    parser.add_argument("--tolerance", type=int, default=1, help="Allowed difference in levels (rounding)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'filter':<13}{'mode':<6}{'size':>6}  {'PIL ms':>9}{'NumPy ms':>10}{'ratio':>7}  max diff")
+    for size in (int(s) for s in args.sizes.split(",")):
+        base = make_test_image(size, size)
+        for mode in args.modes.split(","):
+            image = base.convert(mode)
+            for name in FILTER_NAMES:
+                results = {}
+                times = {}
+                for backend in BACKEND_NAMES:
+                    results[backend], times[backend] = best_time(
+                        apply_filter, image, name, backend, repeat=args.repeat
+                    )
+                pil, fast = (np.asarray(results[b], dtype=np.int16) for b in BACKEND_NAMES)
+                diff = int(np.abs(pil - fast).max()) if pil.shape == fast.shape else None
+                ok = diff is not None and diff <= args.tolerance
+                failures += not ok
+                print(f"{name:<13}{mode:<6}{size:>6}  {times['PIL'] * 1000:>9.1f}{times['NumPy'] * 1000:>10.1f}"
+                      f"{times['PIL'] / times['NumPy']:>7.2f}  {diff if diff is not None else 'shape'}"
+                      f"{'' if ok else '  FAIL'}")
+
+    if failures:
+        print(f"{failures} comparisons exceeded the tolerance")
+        sys.exit(1)
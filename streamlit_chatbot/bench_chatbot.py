@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import statistics
+import subprocess
+import time
+import uuid
+
+from bench_server import BrowserSession, cpu_seconds, rss_mb, serve
+
+# --- Load test for chatbot.py ---
+# Serves chatbot.py with a fake genai model of configurable latency under a
+# real `streamlit run` server and sweeps the number of concurrent sessions,
+# all of them sessions of that one server process (see bench_server), so they
+# share its response cache, backend event loop, client pool and rate limit.
+# Results go to a JSON and a CSV file so runs can be compared between commits.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(HERE, "chatbot.py")
+
+# Served instead of chatbot.py: installs the fake model in the server process first
+FAKE_APP = """
+import sys
+import fake_genai
+if "google.generativeai" not in sys.modules:
+    fake_genai.install({first_token_delay!r}, {chunk_delay!r})
+import chatbot
+chatbot.main()
+"""
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers (q between 0 and 100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+async def run_session(session, turns):
+    """
+    Sends `turns` prompts, then reruns the idle page once.
+    Returns:
+        tuple: (turn latencies, idle rerun seconds)
+    """
+    latencies = []
+    for turn in range(turns):
+        # Unique prompts keep the response cache from answering
+        start = time.perf_counter()
+        await session.chat("chat_input", f"turn {turn} {uuid.uuid4().hex}")
+        latencies.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    await session.rerun()
+    return latencies, time.perf_counter() - start
+
+
+async def measure_level(url, pid, sessions, turns, timeout):
+    # A first session pays for imports, the script compile and building the model,
+    # which every later session shares
+    warm_up = BrowserSession(url, timeout)
+    await warm_up.connect()
+    await warm_up.chat("chat_input", f"warm up {uuid.uuid4().hex}")
+    await warm_up.close()
+    rss_start = rss_mb(pid)
+
+    browsers = [BrowserSession(url, timeout) for _ in range(sessions)]
+    for browser in browsers:
+        await browser.connect()
+    cpu_start = cpu_seconds(pid)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_session(browser, turns) for browser in browsers))
+    elapsed = time.perf_counter() - start
+    cpu = cpu_seconds(pid) - cpu_start
+    # Measured while the sessions (and their session state) are still open
+    rss = rss_mb(pid) - rss_start
+    for browser in browsers:
+        await browser.close()
+
+    latencies = [t for session_latencies, _ in results for t in session_latencies]
+    reruns = [rerun for _, rerun in results]
+    return {
+        "sessions": sessions,
+        "turns": len(latencies),
+        "elapsed_s": elapsed,
+        "turns_per_s": len(latencies) / elapsed,
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "p99_s": percentile(latencies, 99),
+        "mean_s": statistics.fmean(latencies),
+        "rerun_p50_s": percentile(reruns, 50),
+        "rerun_p99_s": percentile(reruns, 99),
+        "server_cpu_s_per_turn": cpu / len(latencies),
+        "memory_per_session_kb": rss * 1024 / sessions,
+    }
+
+
+def run_level(sessions, turns, timeout, first_token_delay, chunk_delay):
+    """Runs `sessions` chat sessions at once against a fresh server and summarizes their timings."""
+    script = os.path.join(HERE, f"_bench_chatbot_{os.getpid()}.py")
+    with open(script, "w") as f:
+        f.write(FAKE_APP.format(first_token_delay=first_token_delay, chunk_delay=chunk_delay))
+    try:
+        # chatbot.py refuses to start without a key
+        with serve(script, env={"GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "fake-key")},
+                   timeout=timeout) as (url, pid):
+            return asyncio.run(measure_level(url, pid, sessions, turns, timeout))
+    finally:
+        os.remove(script)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       cwd=os.path.dirname(APP_PATH)).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark chatbot.py under concurrent sessions.")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="Comma-separated session counts")
+    parser.add_argument("--turns", type=int, default=5, help="Prompts per session")
+    parser.add_argument("--first-token-delay", type=float, default=0.2)
+    parser.add_argument("--chunk-delay", type=float, default=0.01)
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds allowed per script run")
+    parser.add_argument("--out", default="bench_results/chatbot", help="Output path without extension")
+    args = parser.parse_args()
+
+    rows = []
+    for level in (int(n) for n in args.levels.split(",")):
+        row = run_level(level, args.turns, args.timeout, args.first_token_delay, args.chunk_delay)
+        rows.append(row)
+        print(f"{level:>4} sessions: p50 {row['p50_s']:.3f}s  p95 {row['p95_s']:.3f}s  "
+              f"p99 {row['p99_s']:.3f}s  rerun {row['rerun_p50_s'] * 1000:.1f}ms  "
+              f"{row['server_cpu_s_per_turn'] * 1000:.1f}ms server CPU/turn  "
+              f"{row['memory_per_session_kb']:.0f} KiB/session")
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out + ".json", "w") as f:
+        json.dump({
+            "commit": git_commit(),
+            "params": vars(args),
+            "results": rows,
+        }, f, indent=2)
+    with open(args.out + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Wrote {args.out}.json and {args.out}.csv")
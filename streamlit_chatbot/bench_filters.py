@@ -0,0 +1,56 @@
+import argparse
+import os
+import time
+
+from PIL import Image, ImageChops
+
+from filter_engine import FILTER_NAMES, apply_filter, filter_tiled, get_executor
+
+# --- Speedup of the tiled filter engine by core count ---
+# Filters a synthetic photo-sized image with a single PIL call and with the
+# tiled engine on 1, 2, 4, ... processes, checking every result is identical.
+
+
+def make_test_image(width, height):
+    """Random noise with a gradient, so every tile has different content."""
+    noise = Image.frombytes("RGB", (width, height), os.urandom(width * height * 3))
+    gradient = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    return Image.blend(noise, gradient, 0.5)
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def worker_counts(maximum):
+    counts, n = [], 1
+    while n < maximum:
+        counts.append(n)
+        n *= 2
+    return counts + [maximum]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the tiled filter engine.")
+    parser.add_argument("--width", type=int, default=8000)
+    parser.add_argument("--height", type=int, default=5000)
+    parser.add_argument("--filters", nargs="+", default=FILTER_NAMES, choices=FILTER_NAMES)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    image = make_test_image(args.width, args.height)
+    print(f"{args.width}x{args.height} ({args.width * args.height / 1e6:.0f} MP), "
+          f"{os.cpu_count()} cores available")
+
+    for name in args.filters:
+        expected, single_s = timed(apply_filter, image, name)
+        print(f"\n{name}: single PIL call {single_s:.2f}s")
+        for workers in worker_counts(args.max_workers):
+            executor = get_executor(workers)
+            list(executor.map(abs, range(workers * 4)))  # Start the worker processes
+            result, tiled_s = timed(filter_tiled, image, name, executor=executor)
+            identical = ImageChops.difference(result, expected).getbbox() is None
+            print(f"  {workers:>3} workers: {tiled_s:.2f}s  speedup {single_s / tiled_s:.2f}x  "
+                  f"{'identical' if identical else 'MISMATCH'}")
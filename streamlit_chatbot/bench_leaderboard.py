@@ -0,0 +1,110 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bench_chatbot import percentile
+from leaderboard import SCHEMA, Leaderboard
+from memory_engine import DIFFICULTIES
+
+# --- Leaderboard throughput and query latency at scale ---
+# Fills a leaderboard file with --rows random finished games, then measures:
+#   * top-10 queries straight from the index and from the in-memory cache;
+#   * games per second when --writers processes record --games games each at
+#     once, batched (the default) and with one transaction per game.
+
+
+def fill(path, rows, seed):
+    """Bulk loads `rows` random games, then the totals they imply."""
+    rng = random.Random(seed)
+    difficulties = list(DIFFICULTIES)
+    conn = sqlite3.connect(path)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    now = time.time()
+    with conn:
+        for start in range(0, rows, 100_000):
+            conn.executemany(
+                "INSERT INTO games (difficulty, moves, seconds, player, finished) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (difficulty := rng.choice(difficulties),
+                     DIFFICULTIES[difficulty][0] * DIFFICULTIES[difficulty][1] // 2 + rng.randrange(40),
+                     rng.uniform(10, 600), f"player{rng.randrange(100_000)}", now - rng.uniform(0, 3e7))
+                    for _ in range(min(100_000, rows - start))
+                ],
+            )
+        conn.execute(
+            "INSERT OR REPLACE INTO totals SELECT difficulty, COUNT(*), MIN(moves), "
+            "(SELECT seconds FROM games AS best WHERE best.difficulty = games.difficulty "
+            "ORDER BY moves, seconds LIMIT 1) FROM games GROUP BY difficulty"
+        )
+    conn.close()
+
+
+def time_queries(path, queries, cache_ttl):
+    leaderboard = Leaderboard(path, cache_ttl=cache_ttl)
+    difficulties = list(DIFFICULTIES)
+    latencies = []
+    for i in range(queries):
+        start = time.perf_counter()
+        leaderboard.top(difficulties[i % len(difficulties)])
+        latencies.append(time.perf_counter() - start)
+    return {"p50_ms": percentile(latencies, 50) * 1000, "p95_ms": percentile(latencies, 95) * 1000}
+
+
+def write_games(path, games, batch_size, seed):
+    """Runs in a writer process: records `games` games as fast as it can. Returns (commits, start, end)."""
+    rng = random.Random(seed)
+    leaderboard = Leaderboard(path, batch_size=batch_size)
+    start = time.time()
+    for _ in range(games):
+        if batch_size == 1:
+            leaderboard.flush()  # Wait for each commit, like a writer without a queue
+        leaderboard.record(rng.choice(list(DIFFICULTIES)), rng.randrange(8, 80), rng.uniform(10, 600), "bench")
+    leaderboard.flush()
+    return leaderboard.commits, start, time.time()
+
+
+def time_writers(path, writers, games, batch_size):
+    with ProcessPoolExecutor(writers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        runs = list(pool.map(write_games, [path] * writers, [games] * writers, [batch_size] * writers,
+                             range(writers)))
+    elapsed = max(run[2] for run in runs) - min(run[1] for run in runs)  # Leaves out process start-up
+    return {"games_per_s": writers * games / elapsed, "commits": sum(run[0] for run in runs)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the memo3 leaderboard.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Games already on the leaderboard")
+    parser.add_argument("--writers", type=int, default=8, help="Processes recording games at once")
+    parser.add_argument("--games", type=int, default=2000, help="Games each writer records")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "leaderboard.db")
+        start = time.perf_counter()
+        fill(path, args.rows, args.seed)
+        print(f"filled {args.rows:,} games in {time.perf_counter() - start:.1f}s")
+        results = {
+            "rows": args.rows,
+            "top_uncached": time_queries(path, args.queries, cache_ttl=0),
+            "top_cached": time_queries(path, args.queries, cache_ttl=60),
+            "batched": time_writers(path, args.writers, args.games, batch_size=500),
+            "unbatched": time_writers(path, args.writers, args.games, batch_size=1),
+        }
+    for name in ("top_uncached", "top_cached"):
+        print(f"{name:<14} p50 {results[name]['p50_ms']:7.3f} ms  p95 {results[name]['p95_ms']:7.3f} ms")
+    for name in ("batched", "unbatched"):
+        print(f"{name:<14} {results[name]['games_per_s']:9,.0f} games/s  {results[name]['commits']:,} commits "
+              f"({args.writers} writers x {args.games} games)")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
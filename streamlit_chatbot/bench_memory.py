@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import random
+import time
+
+from bench_startup import script_at
+
+# --- Script runs and server CPU per move in the memory card games ---
+# A simulated player with perfect memory plays memory2.py and memo3.py through
+# Streamlit's AppTest: it turns over an unseen card, then its partner if that
+# face has been seen before, otherwise another unseen card. After a mismatch
+# it waits FLIP_BACK_S before the next click, as a person would wait for the
+# cards to turn back. Every script run is counted, including the reruns a
+# script asks for itself, with the CPU time and the bytes of messages it sends.
+# AppTest starts a full run for each click; when the click's callback asks
+# for a fragment rerun instead (memo3's cards), that run is cut short and
+# counts as one of the runs, as does each card fragment it reruns. So memo3's
+# runs per move went up when its cards became separate fragments, while its
+# CPU and bytes per move went down. memory2's board fragment is rerun in full
+# by AppTest, where a browser would rerun only the fragment, so its CPU per
+# move is an upper bound.
+# --compare REV measures the scripts from a git revision as well. --sizes
+# instead deals custom memo3 boards of each size and reports the CPU of the
+# full rerun that draws the board and of a card click on it. Every run also
+# reports the bytes of an idle full rerun; AppTest does not read
+# .streamlit/config.toml, so pass --static to serve memo3's theme as the
+# server would.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = ("memory2.py", "memo3.py")
+FLIP_BACK_S = 1.5
+IDLE_RERUNS = 5
+
+
+class RunCounter:
+    """Counts script runs and the bytes of ForwardMsgs they send, across every AppTest run."""
+
+    def __init__(self):
+        self.runs = 0
+        self.bytes = 0
+
+    def install(self):
+        from streamlit.runtime.scriptrunner import ScriptRunnerEvent
+        from streamlit.testing.v1 import local_script_runner
+
+        counter = self
+        runner_class = local_script_runner.LocalScriptRunner
+        original_init = runner_class.__init__
+
+        def __init__(self, *args, **kwargs):
+            original_init(self, *args, **kwargs)
+
+            def record(sender, event, **data):
+                if event == ScriptRunnerEvent.SCRIPT_STARTED:
+                    counter.runs += 1
+                elif event == ScriptRunnerEvent.ENQUEUE_FORWARD_MSG:
+                    counter.bytes += data["forward_msg"].ByteSize()
+
+            self.on_event.connect(record, weak=False)
+
+        runner_class.__init__ = __init__
+
+
+def snapshot(game):
+    """(faces, matched flags, complete) of a memory_engine game, or of the dict older revisions kept."""
+    if isinstance(game, dict):
+        return game['cards'], game['matched'], game['game_complete']
+    return [game.face(i) for i in range(game.size)], [game.is_matched(i) for i in range(game.size)], game.complete
+
+
+class Session:
+    """
+    One player's AppTest session, with the cost of every interaction added to `totals`.
+    A run of a single card's fragment leaves AppTest holding only that card, while a
+    browser keeps the whole page on screen, so clicks go through the last full page.
+    """
+
+    def __init__(self, script, counter, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.counter = counter
+        self.totals = {"clicks": 0, "runs": 0, "cpu_s": 0.0, "bytes": 0}
+        self.at = AppTest.from_file(script, default_timeout=timeout)
+        self.at.run()
+        self.page = self.at.button[0].root
+
+    def game(self):
+        return snapshot(self.at.session_state.game_state)
+
+    def _measure(self, action):
+        runs, sent = self.counter.runs, self.counter.bytes
+        start = time.process_time()
+        action()
+        self.totals["cpu_s"] += time.process_time() - start
+        self.totals["runs"] += self.counter.runs - runs
+        self.totals["bytes"] += self.counter.bytes - sent
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].message)
+
+    def rerun(self):
+        """A full rerun with nothing changed, as when another widget on the page is used."""
+        self._measure(self.at.run)
+        self.page = self.at.button[0].root
+
+    def click(self, key):
+        button = self.page.button(key=key)
+        self._measure(lambda: button.click().run())
+        self.totals["clicks"] += 1
+        button.set_value(False)  # A browser sends a click once
+        if any(button.key == "new_game" for button in self.at.button):
+            self.page = self.at.button[0].root  # This run drew the whole page
+        return self.game()
+
+
+def play(script, games, seed, counter, timeout):
+    """Plays `games` games. Returns per-move totals: moves, script runs, CPU seconds and bytes sent."""
+    rng = random.Random(seed)
+    totals = {"moves": 0, "runs": 0, "cpu_s": 0.0, "bytes": 0}
+
+    for _ in range(games):
+        session = Session(script, counter, timeout)  # A new session per game
+
+        seen = {}  # Face -> unmatched positions seen so far
+        faces, matched, complete = session.game()
+        while not complete:
+            pair = next((positions for positions in seen.values() if len(positions) == 2), None)
+            if pair:
+                first, second = pair
+                faces, matched, complete = session.click(f"card_{first}")
+            else:
+                known = {i for positions in seen.values() for i in positions}
+                unseen = [i for i in range(len(faces)) if not matched[i] and i not in known]
+                first = rng.choice(unseen)
+                faces, matched, complete = session.click(f"card_{first}")
+                face = faces[first]
+                partner = seen.get(face)
+                second = partner[0] if partner else rng.choice([i for i in unseen if i != first])
+                seen.setdefault(face, []).append(first)
+            faces, matched, complete = session.click(f"card_{second}")
+            shown_at = time.perf_counter()  # The pair is on screen from here
+            totals["moves"] += 1
+            face = faces[second]
+            if face == faces[first]:
+                seen.pop(face, None)
+            else:
+                seen.setdefault(face, []).append(second)
+                time.sleep(max(0.0, FLIP_BACK_S - (time.perf_counter() - shown_at)))
+        for name in ("runs", "cpu_s", "bytes"):
+            totals[name] += session.totals[name]
+    return totals
+
+
+def sweep_sizes(script, sizes, moves, counter, timeout):
+    """
+    Deals each custom board in memo3 and plays `moves` matching pairs on it.
+    Returns:
+        list: Per size, the milliseconds of CPU for the full rerun that deals the board and per card click.
+    """
+    results = []
+    for size in sizes:
+        rows, cols = map(int, size.split("x"))
+        session = Session(script, counter, timeout)
+        session.at.number_input(key="custom_rows").set_value(rows)
+        session.at.number_input(key="custom_cols").set_value(cols)
+        session.page = session.at.button[0].root
+        session.click("custom_btn")
+        deal = dict(session.totals)
+        faces, matched, complete = session.game()
+        pairs = {}
+        for index, face in enumerate(faces):
+            pairs.setdefault(face, []).append(index)
+        for first, second in list(pairs.values())[:moves]:
+            session.click(f"card_{first}")
+            session.click(f"card_{second}")
+        clicks = max(session.totals["clicks"] - deal["clicks"], 1)
+        results.append({
+            "size": size,
+            "cards": rows * cols,
+            "full_run_ms": deal["cpu_s"] * 1000,
+            "click_ms": (session.totals["cpu_s"] - deal["cpu_s"]) * 1000 / clicks,
+            "runs_per_click": (session.totals["runs"] - deal["runs"]) / clicks,
+            "kb_per_click": (session.totals["bytes"] - deal["bytes"]) / 1024 / clicks,
+        })
+        print(f"  {size:>7} {rows * cols:>5} cards: full rerun {results[-1]['full_run_ms']:8.1f} ms  "
+              f"click {results[-1]['click_ms']:7.1f} ms  {results[-1]['runs_per_click']:.1f} runs  "
+              f"{results[-1]['kb_per_click']:7.1f} KB")
+    return results
+
+
+def measure(script, args, counter):
+    totals = play(script, args.games, args.seed, counter, args.timeout)
+    moves = max(totals["moves"], 1)
+    session = Session(script, counter, args.timeout)
+    for _ in range(IDLE_RERUNS):
+        session.rerun()
+    return {
+        "kb_per_rerun": session.totals["bytes"] / 1024 / IDLE_RERUNS,
+        "moves": totals["moves"],
+        "runs_per_move": totals["runs"] / moves,
+        "cpu_ms_per_move": totals["cpu_s"] * 1000 / moves,
+        "kb_per_move": totals["bytes"] / 1024 / moves,
+    }
+
+
+def report(label, result):
+    print(f"  {label:<20}{result['runs_per_move']:>8.1f} runs/move {result['cpu_ms_per_move']:>9.1f} ms CPU/move "
+          f"{result['kb_per_move']:>9.1f} KB/move {result['kb_per_rerun']:>7.1f} KB/rerun  ({result['moves']} moves)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure script reruns per move in the memory games.")
+    parser.add_argument("--scripts", default=",".join(SCRIPTS), help="Comma-separated apps to measure")
+    parser.add_argument("--games", type=int, default=1, help="Games per app")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--sizes", help='Instead of playing games, time memo3 on custom boards, e.g. "4x4,10x10,20x20"')
+    parser.add_argument("--moves", type=int, default=10, help="Matching pairs to play on each --sizes board")
+    parser.add_argument("--compare", metavar="REV", help="Also measure the apps from this git revision")
+    parser.add_argument("--static", action="store_true",
+                        help="Turn on static file serving, as .streamlit/config.toml does for the real server")
+    parser.add_argument("--out", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.static:
+        from streamlit import config
+        config.set_option("server.enableStaticServing", True)
+
+    counter = RunCounter()
+    counter.install()
+    results = {}
+    if args.sizes:
+        print("memo3.py")
+        results["sizes"] = sweep_sizes(os.path.join(HERE, "memo3.py"), args.sizes.split(","), args.moves,
+                                       counter, args.timeout)
+    for name in [] if args.sizes else args.scripts.split(","):
+        print(name)
+        results[name] = {"current": measure(os.path.join(HERE, name), args, counter)}
+        report("current", results[name]["current"])
+        if args.compare:
+            old_script = script_at(args.compare, name)
+            try:
+                results[name][args.compare] = measure(old_script, args, counter)
+            finally:
+                os.remove(old_script)
+            report(args.compare, results[name][args.compare])
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
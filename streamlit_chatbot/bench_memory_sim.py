@@ -0,0 +1,282 @@
+import argparse
+import json
+import multiprocessing
+import os
+import pickle
+import random
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import memory_engine
+from memory_engine import COMPLETE, FLIP_BACK_S, MATCH, MISMATCH, MemoryGame
+
+# --- Headless memory games with scripted players ---
+# Plays memory_engine games on a simulated clock, with no Streamlit and no
+# waiting, across a process pool. Games are split into fixed-size chunks
+# seeded from --seed and the chunk number, so the same seed gives the same
+# games whatever the number of workers. Reports games and clicks per second,
+# the bytes a game takes (pickled state and move log) and the distribution of
+# moves needed to finish, per strategy.
+#
+# A strategy is a class with `choose(game, rng) -> card` and
+# `saw(card, symbol, result)`, called after each click with what it turned up;
+# a new instance plays each game. --log-out writes the move logs of the first
+# chunk to a file, and --replay checks such a file by replaying every game.
+
+CHUNK_GAMES = 2_000
+THINK_S = 0.5  # Simulated time between clicks
+
+
+def _face_down(game):
+    return [i for i in range(game.size) if not game.face_up >> i & 1]
+
+
+class RandomPlayer:
+    """Remembers nothing: turns over random face-down cards."""
+
+    def choose(self, game, rng):
+        return rng.choice(_face_down(game))
+
+    def saw(self, card, symbol, result):
+        pass
+
+
+class PerfectPlayer:
+    """Remembers every card it has seen and plays a known pair as soon as it can."""
+
+    def __init__(self):
+        self.seen = {}  # Symbol -> unmatched cards seen with it
+
+    def choose(self, game, rng):
+        if game.first_card is not None:
+            symbol = game.cards[game.first_card]
+            partner = [i for i in self.seen.get(symbol, ()) if i != game.first_card]
+            if partner:
+                return partner[0]
+        else:
+            for cards in self.seen.values():
+                if len(cards) == 2:
+                    return cards[0]
+        known = {i for cards in self.seen.values() for i in cards}
+        return rng.choice([i for i in _face_down(game) if i not in known] or _face_down(game))
+
+    def saw(self, card, symbol, result):
+        if result in (MATCH, COMPLETE):
+            self.seen.pop(symbol, None)
+            return
+        cards = self.seen.setdefault(symbol, [])
+        if card not in cards:
+            cards.append(card)
+
+
+class ForgetfulPlayer(PerfectPlayer):
+    """Plays like PerfectPlayer but only remembers the last `capacity` cards it saw."""
+
+    capacity = 6
+
+    def __init__(self):
+        super().__init__()
+        self.recent = deque()
+
+    def saw(self, card, symbol, result):
+        super().saw(card, symbol, result)
+        self.recent.append((card, symbol))
+        if len(self.recent) > self.capacity:
+            old_card, old_symbol = self.recent.popleft()
+            cards = self.seen.get(old_symbol, [])  # Gone already if the pair was matched
+            if old_card in cards and (old_card, old_symbol) not in self.recent:
+                cards.remove(old_card)
+                if not cards:
+                    del self.seen[old_symbol]
+
+
+STRATEGIES = {
+    "random": RandomPlayer,
+    "perfect": PerfectPlayer,
+    "forgetful": ForgetfulPlayer,
+}
+
+
+def play_game(strategy, rows, cols, rng, log=False):
+    """Plays one game to the end on a simulated clock. Returns (game, clicks)."""
+    clock = [0.0]
+    game = MemoryGame(rows, cols, rng=rng, clock=lambda: clock[0], log=log)
+    player = STRATEGIES[strategy]()
+    clicks = 0
+    while not game.complete:
+        card = player.choose(game, rng)
+        result = game.click(card)
+        clicks += 1
+        player.saw(card, game.cards[card], result)
+        if result == MISMATCH:
+            clock[0] += FLIP_BACK_S  # Wait for the pair to turn back over
+        clock[0] += THINK_S
+    game.clock = None
+    return game, clicks
+
+
+def play_chunk(strategy, rows, cols, games, seed, keep_logs=False):
+    """
+    Runs in a worker: plays `games` games.
+    Returns:
+        dict: Moves histogram, clicks, seconds spent, bytes of state and log, and the logs if kept.
+    """
+    rng = random.Random(seed)
+    moves = Counter()
+    clicks = state_bytes = log_bytes = 0
+    logs = []
+    start = time.perf_counter()
+    for _ in range(games):
+        game, game_clicks = play_game(strategy, rows, cols, rng, log=True)
+        moves[game.moves] += 1
+        clicks += game_clicks
+        log_bytes += len(game.log)
+        if keep_logs:
+            logs.append(bytes(game.log))
+        game.log = None
+        state_bytes += len(pickle.dumps(game))
+    return {
+        "moves": moves,
+        "clicks": clicks,
+        "seconds": time.perf_counter() - start,
+        "state_bytes": state_bytes,
+        "log_bytes": log_bytes,
+        "logs": logs,
+    }
+
+
+def percentile(histogram, q):
+    rank = q / 100 * sum(histogram.values())
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen >= rank:
+            return value
+    return None
+
+
+def run(strategies, rows, cols, games, seed, workers, log_out=None):
+    executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    jobs = []
+    for strategy_index, strategy in enumerate(strategies):
+        for chunk, start in enumerate(range(0, games, CHUNK_GAMES)):
+            chunk_seed = seed * 1_000_003 + strategy_index * 10_007 + chunk
+            jobs.append((strategy, executor.submit(
+                play_chunk, strategy, rows, cols, min(CHUNK_GAMES, games - start), chunk_seed,
+                keep_logs=bool(log_out) and chunk == 0)))
+
+    start = time.perf_counter()
+    totals = {strategy: {"moves": Counter(), "clicks": 0, "seconds": 0.0, "state_bytes": 0, "log_bytes": 0}
+              for strategy in strategies}
+    logs = []
+    with executor:
+        for strategy, future in jobs:
+            result = future.result()
+            total = totals[strategy]
+            total["moves"].update(result["moves"])
+            for name in ("clicks", "seconds", "state_bytes", "log_bytes"):
+                total[name] += result[name]
+            logs.extend(result["logs"])
+    elapsed = time.perf_counter() - start
+
+    if log_out:
+        write_logs(log_out, logs)
+    results = {}
+    for strategy, total in totals.items():
+        histogram = total["moves"]
+        results[strategy] = {
+            "games": games,
+            "seed": seed,
+            "board": f"{rows}x{cols}",
+            # Per worker-second, so the number does not depend on core count
+            "games_per_s": games / total["seconds"],
+            "clicks_per_s": total["clicks"] / total["seconds"],
+            "state_bytes_per_game": total["state_bytes"] / games,
+            "log_bytes_per_game": total["log_bytes"] / games,
+            "moves_mean": sum(value * count for value, count in histogram.items()) / games,
+            "moves_min": min(histogram),
+            **{f"moves_p{q}": percentile(histogram, q) for q in (50, 90, 99)},
+            "moves_max": max(histogram),
+            "moves_histogram": dict(sorted(histogram.items())),
+        }
+    return results, elapsed
+
+
+def write_logs(path, logs):
+    """Appends logs to a file, each prefixed with its length (4 bytes, little-endian)."""
+    with open(path, "ab") as f:
+        for log in logs:
+            f.write(len(log).to_bytes(4, "little"))
+            f.write(log)
+
+
+def read_logs(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset < len(data):
+        length = int.from_bytes(data[offset:offset + 4], "little")
+        yield data[offset + 4:offset + 4 + length]
+        offset += 4 + length
+
+
+def check_replays(path):
+    """Replays every game in a log file. Returns (games, moves per second, unfinished games)."""
+    games = moves = unfinished = 0
+    start = time.perf_counter()
+    for log in read_logs(path):
+        game = memory_engine.replay(log)
+        games += 1
+        moves += game.moves
+        unfinished += not game.complete
+    return games, moves / (time.perf_counter() - start), unfinished
+
+
+def print_histogram(histogram, width=40):
+    peak = max(histogram.values())
+    for value, count in histogram.items():
+        print(f"    {value:>4} {'#' * max(1, round(count / peak * width)):<{width}} {count}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless memory game simulator.")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES),
+                        help=f"Comma-separated, from: {', '.join(STRATEGIES)}")
+    parser.add_argument("--board", default="4x4", help='Rows x columns, e.g. "4x4" or "10x10"')
+    parser.add_argument("--games", type=int, default=100_000, help="Games per strategy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--histogram", action="store_true", help="Print the moves-to-complete histograms")
+    parser.add_argument("--log-out", help="Append the move logs of each strategy's first chunk to this file")
+    parser.add_argument("--replay", metavar="FILE", help="Only replay the games in a --log-out file")
+    parser.add_argument("--out", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.replay:
+        games, moves_per_s, unfinished = check_replays(args.replay)
+        print(f"replayed {games:,} games at {moves_per_s:,.0f} moves/s, {unfinished} unfinished")
+        sys.exit(1 if unfinished else 0)
+
+    names = args.strategies.split(",")
+    unknown = [name for name in names if name not in STRATEGIES]
+    if unknown:
+        parser.error(f"Unknown strategies: {', '.join(unknown)}")
+    rows, cols = map(int, args.board.split("x"))
+    results, elapsed = run(names, rows, cols, args.games, args.seed, args.workers, args.log_out)
+
+    print(f"{args.games:,} games per strategy on {args.board}, seed {args.seed}, {args.workers} workers, "
+          f"{elapsed:.1f}s")
+    print(f"{'strategy':<11}{'games/s':>10}{'clicks/s':>11}{'state B':>9}{'log B':>8}"
+          f"{'mean':>7}{'min':>5}{'p50':>5}{'p90':>5}{'p99':>5}{'max':>5}  moves to finish")
+    for name, result in results.items():
+        print(f"{name:<11}{result['games_per_s']:>10,.0f}{result['clicks_per_s']:>11,.0f}"
+              f"{result['state_bytes_per_game']:>9.0f}{result['log_bytes_per_game']:>8.0f}"
+              f"{result['moves_mean']:>7.1f}{result['moves_min']:>5}{result['moves_p50']:>5}"
+              f"{result['moves_p90']:>5}{result['moves_p99']:>5}{result['moves_max']:>5}")
+        if args.histogram:
+            print_histogram(result["moves_histogram"])
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
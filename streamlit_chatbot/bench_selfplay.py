@@ -0,0 +1,258 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import mnk_engine
+import ttt_engine
+
+# --- Headless self-play for tic-tac-toe strategies ---
+# Plays every requested pairing, each strategy taking both X and O, across a
+# process pool. Games are split into fixed-size chunks seeded from --seed and
+# the chunk number, so results do not depend on the number of workers: the
+# same seed and code give the same counts. Reports win/draw/loss rates, moves
+# per second and per-move latency percentiles per strategy. Latencies go into
+# log-spaced buckets (4 per doubling), so millions of games merge cheaply and
+# percentiles are accurate to about 19%.
+#
+# Regressions fail the run (exit status 1):
+#   * "perfect" losing any game;
+#   * with --baseline, any pairing's rates moving by more than --rate-tolerance
+#     (only compared when --games and --seed match the baseline's) or its
+#     moves/s dropping by more than --speed-tolerance.
+#
+# A strategy is a function (x_bits, o_bits, rng) -> square for the side to
+# move (X moves first). Add new engines to STRATEGIES.
+
+CHUNK_GAMES = 10_000
+CORNERS = (0, 2, 6, 8)
+SIDES = (1, 3, 5, 7)
+
+
+def _side_to_move(x_bits, o_bits):
+    """(own bits, opponent bits) for the player whose turn it is."""
+    if bin(x_bits).count("1") == bin(o_bits).count("1"):
+        return x_bits, o_bits
+    return o_bits, x_bits
+
+
+def random_move(x_bits, o_bits, rng):
+    return rng.choice(ttt_engine.squares(ttt_engine.free_squares(x_bits, o_bits)))
+
+
+def heuristic_move(x_bits, o_bits, rng):
+    """The strategy ttt.py used before the solved table: win, block, center, corner, side."""
+    me, opp = _side_to_move(x_bits, o_bits)
+    free = ttt_engine.free_squares(x_bits, o_bits)
+    available = ttt_engine.squares(free)
+    for bits in (me, opp):  # Win if possible, otherwise block
+        for move in available:
+            if ttt_engine.is_win(bits | 1 << move):
+                return move
+    if free >> 4 & 1:
+        return 4
+    for group in (CORNERS, SIDES):
+        group = list(group)
+        rng.shuffle(group)
+        for move in group:
+            if free >> move & 1:
+                return move
+    return available[0]
+
+
+def perfect_move(x_bits, o_bits, rng):
+    moves, _ = ttt_engine.best_moves(x_bits, o_bits)
+    return rng.choice(ttt_engine.squares(moves))
+
+
+def search_move(x_bits, o_bits, rng):
+    """mnk_engine's search on 3x3, capped by depth rather than time so games are reproducible."""
+    move, _ = mnk_engine.choose_move(3, 3, 3, x_bits, o_bits, budget_s=60, max_depth=4)
+    return move
+
+
+STRATEGIES = {
+    "random": random_move,
+    "heuristic": heuristic_move,
+    "perfect": perfect_move,
+    "search": search_move,
+}
+
+
+def bucket(ns):
+    return int(math.log2(max(ns, 1)) * 4)
+
+
+def bucket_ns(index):
+    """Upper edge of a latency bucket, in nanoseconds."""
+    return 2 ** ((index + 1) / 4)
+
+
+def play_chunk(first, second, games, seed):
+    """
+    Runs in a worker: `first` plays X and `second` plays O for `games` games.
+    Returns:
+        dict: Outcome counts, moves, time spent choosing moves and latency histograms.
+    """
+    ttt_engine.get_table(os.environ.get("TTT_TABLE_PATH"))  # Solve before the clock starts
+    rng = random.Random(seed)
+    players = (STRATEGIES[first], STRATEGIES[second])
+    histograms = (Counter(), Counter())
+    outcomes = Counter()
+    moves = 0
+    think_ns = 0
+    for _ in range(games):
+        bits = [0, 0]
+        turn = 0
+        while True:
+            start = time.perf_counter_ns()
+            square = players[turn](bits[0], bits[1], rng)
+            elapsed = time.perf_counter_ns() - start
+            think_ns += elapsed
+            histograms[turn][bucket(elapsed)] += 1
+            bits[turn] |= 1 << square
+            moves += 1
+            if ttt_engine.is_win(bits[turn]):
+                outcomes["x_wins" if turn == 0 else "o_wins"] += 1
+                break
+            if ttt_engine.is_full(bits[0], bits[1]):
+                outcomes["draws"] += 1
+                break
+            turn ^= 1
+    return {
+        "outcomes": outcomes,
+        "moves": moves,
+        "think_ns": think_ns,
+        "histograms": histograms,
+    }
+
+
+def percentile(histogram, q):
+    total = sum(histogram.values())
+    rank = q / 100 * total
+    seen = 0
+    for index in sorted(histogram):
+        seen += histogram[index]
+        if seen >= rank:
+            return bucket_ns(index)
+    return None
+
+
+def run(pairings, games, seed, workers):
+    """
+    Plays `games` games for every (X strategy, O strategy) pairing.
+    Returns:
+        tuple: (results per pairing, latency histogram per strategy)
+    """
+    executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    jobs = []
+    for pairing_index, (first, second) in enumerate(pairings):
+        for chunk, start in enumerate(range(0, games, CHUNK_GAMES)):
+            chunk_seed = seed * 1_000_003 + pairing_index * 10_007 + chunk
+            jobs.append(((first, second), executor.submit(
+                play_chunk, first, second, min(CHUNK_GAMES, games - start), chunk_seed)))
+
+    totals = {pairing: {"outcomes": Counter(), "moves": 0, "think_ns": 0} for pairing in pairings}
+    latencies = {name: Counter() for pairing in pairings for name in pairing}
+    with executor:
+        for (first, second), future in jobs:
+            result = future.result()
+            total = totals[(first, second)]
+            total["outcomes"].update(result["outcomes"])
+            total["moves"] += result["moves"]
+            total["think_ns"] += result["think_ns"]
+            latencies[first].update(result["histograms"][0])
+            latencies[second].update(result["histograms"][1])
+
+    results = {}
+    for (first, second), total in totals.items():
+        outcomes = total["outcomes"]
+        results[f"{first} vs {second}"] = {
+            "x": first,
+            "o": second,
+            "games": games,
+            "seed": seed,
+            "x_win_rate": outcomes["x_wins"] / games,
+            "draw_rate": outcomes["draws"] / games,
+            "o_win_rate": outcomes["o_wins"] / games,
+            # Moves per second of strategy time, so the number does not depend on core count
+            "moves_per_s": total["moves"] / (total["think_ns"] / 1e9) if total["think_ns"] else None,
+        }
+    return results, latencies
+
+
+def find_regressions(results, baseline, rate_tolerance, speed_tolerance):
+    problems = []
+    for name, result in results.items():
+        if result["x"] == "perfect" and result["o_win_rate"] > 0:
+            problems.append(f"{name}: perfect lost {result['o_win_rate']:.4%} of its games as X")
+        if result["o"] == "perfect" and result["x_win_rate"] > 0:
+            problems.append(f"{name}: perfect lost {result['x_win_rate']:.4%} of its games as O")
+        old = (baseline or {}).get(name)
+        if not old:
+            continue
+        same_games = (old["games"], old["seed"]) == (result["games"], result["seed"])
+        for rate in ("x_win_rate", "draw_rate", "o_win_rate") if same_games else ():
+            if abs(result[rate] - old[rate]) > rate_tolerance:
+                problems.append(f"{name}: {rate} {old[rate]:.4f} -> {result[rate]:.4f}")
+        if old["moves_per_s"] and result["moves_per_s"] < old["moves_per_s"] * (1 - speed_tolerance):
+            problems.append(f"{name}: {old['moves_per_s']:.0f} -> {result['moves_per_s']:.0f} moves/s")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Self-play benchmark for tic-tac-toe strategies.")
+    parser.add_argument("--strategies", default="random,heuristic,perfect",
+                        help=f"Comma-separated, from: {', '.join(STRATEGIES)}")
+    parser.add_argument("--games", type=int, default=100_000, help="Games per pairing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes; more than the number of cores makes moves/s meaningless")
+    parser.add_argument("--baseline", help="JSON from an earlier --out run to check for regressions")
+    parser.add_argument("--rate-tolerance", type=float, default=0.0,
+                        help="Allowed change in any outcome rate (0: same seed must give the same games)")
+    parser.add_argument("--speed-tolerance", type=float, default=0.5,
+                        help="Allowed drop in moves/s (timings of microsecond moves are noisy)")
+    parser.add_argument("--out", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    names = args.strategies.split(",")
+    unknown = [name for name in names if name not in STRATEGIES]
+    if unknown:
+        parser.error(f"Unknown strategies: {', '.join(unknown)}")
+    pairings = [(first, second) for first in names for second in names]
+
+    start = time.perf_counter()
+    results, latencies = run(pairings, args.games, args.seed, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(pairings)} pairings x {args.games} games, seed {args.seed}, {args.workers} workers, "
+          f"{elapsed:.1f}s")
+    print(f"{'X vs O':<26}{'X wins':>9}{'draws':>9}{'O wins':>9}{'moves/s':>12}")
+    for name, result in results.items():
+        print(f"{name:<26}{result['x_win_rate']:>9.2%}{result['draw_rate']:>9.2%}"
+              f"{result['o_win_rate']:>9.2%}{result['moves_per_s']:>12,.0f}")
+    print(f"\n{'strategy':<12}{'p50 µs':>9}{'p95 µs':>9}{'p99 µs':>9}")
+    latency_report = {}
+    for name, histogram in latencies.items():
+        latency_report[name] = {f"p{q}_us": percentile(histogram, q) / 1000 for q in (50, 95, 99)}
+        print(f"{name:<12}" + "".join(f"{value:>9.1f}" for value in latency_report[name].values()))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"params": vars(args), "results": results, "latency": latency_report}, f, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    problems = find_regressions(results, baseline, args.rate_tolerance, args.speed_tolerance)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,192 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from contextlib import contextmanager
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+# --- A real Streamlit server and simulated browser tabs for the load tests ---
+# serve() runs `streamlit run` on a script in a process of its own, so every
+# session shares that one process's script threads, caches and rate limits,
+# as real users do. BrowserSession speaks Streamlit's websocket protocol the
+# way a browser tab does: each rerun carries its widget values and the button
+# it clicked, it keeps the latest element of every widget, and it
+# repeats the auto-reruns st.fragment(run_every=...) asks for. The load
+# generator runs in the calling process, so on a small machine it competes
+# with the server for CPU, as browsers on the same box would.
+
+HEALTH_PATH = "/_stcore/health"
+STREAM_PATH = "/_stcore/stream"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def serve(script, env=None, timeout=60):
+    """
+    Runs a headless `streamlit run` on a free port for the duration of a with block.
+    Args:
+        script (str): The app to serve. Its directory is the server's working directory.
+        env (dict): Extra environment variables for the server.
+        timeout (float): Seconds to wait for the server to answer its health check.
+    Yields:
+        tuple: (websocket URL, server process id)
+    """
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", script,
+         "--server.headless", "true", "--server.port", str(port),
+         "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+        cwd=os.path.dirname(os.path.abspath(script)), env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.perf_counter() + timeout
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"streamlit run {script} exited with status {server.returncode}")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}{HEALTH_PATH}", timeout=1).close()
+                break
+            except OSError:
+                if time.perf_counter() > deadline:
+                    raise RuntimeError(f"streamlit run {script} did not start within {timeout}s")
+                time.sleep(0.2)
+        yield f"ws://127.0.0.1:{port}{STREAM_PATH}", server.pid
+    finally:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def cpu_seconds(pid):
+    """User plus system CPU seconds a process has used so far (Linux /proc)."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def rss_mb(pid):
+    """Resident set size of a process in MB (Linux /proc)."""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class BrowserSession:
+    """
+    One browser tab on a served app.
+    Attributes:
+        widgets (dict): The latest element of each widget, by key, e.g. a Button
+            proto with its label and disabled flag. Widgets without a key go by
+            their element type instead, e.g. "chat_input".
+    """
+
+    def __init__(self, url, timeout=60):
+        self.url = url
+        self.timeout = timeout
+        self.widgets = {}
+        self._values = {}  # Key -> (field, value) sent with every rerun, like a browser's widget state
+        self._auto_reruns = {}  # Fragment id -> seconds between its reruns
+        self._socket = None
+
+    async def connect(self):
+        """Opens the session and loads the page."""
+        self._socket = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+        await self._rerun()
+
+    async def close(self):
+        await self._socket.close()
+
+    async def click(self, key):
+        """Clicks a button and waits for the reruns it causes to finish."""
+        await self._rerun(key, "trigger_value", True)
+
+    async def chat(self, key, text):
+        """Submits text through a chat input and waits for the reruns it causes to finish."""
+        await self._rerun(key, "chat_input_value", text)
+
+    async def select(self, key, value):
+        """Picks an option of a selectbox (or any widget holding a string) and waits for the rerun."""
+        self._values[key] = ("string_value", value)
+        await self._rerun()
+
+    async def rerun(self):
+        """Reruns the page without touching a widget."""
+        await self._rerun()
+
+    async def tick(self):
+        """Sleeps until the next fragment auto-rerun is due, then runs every one on the page."""
+        if not self._auto_reruns:
+            raise RuntimeError("No fragment on the page reruns by itself")
+        await asyncio.sleep(min(self._auto_reruns.values()))
+        for fragment_id in list(self._auto_reruns):
+            await self._rerun(fragment_id=fragment_id)
+
+    def _add_state(self, states, key, field, value):
+        state = states.widgets.add()
+        state.id = self.widgets[key].id
+        if field == "chat_input_value":
+            state.chat_input_value.data = value
+        else:
+            setattr(state, field, value)
+
+    async def _rerun(self, trigger=None, field=None, value=None, fragment_id=""):
+        message = BackMsg()
+        client_state = message.rerun_script
+        client_state.query_string = ""
+        client_state.page_script_hash = ""
+        if fragment_id:
+            client_state.fragment_id = fragment_id
+            client_state.is_auto_rerun = True
+        for key, (value_field, current) in self._values.items():
+            if key in self.widgets:
+                self._add_state(client_state.widget_states, key, value_field, current)
+        if trigger is not None:
+            self._add_state(client_state.widget_states, trigger, field, value)
+        await self._socket.send(message.SerializeToString())
+        await self._read_until_finished()
+
+    async def _read_until_finished(self):
+        """Applies the server's messages until its script runs are over (including any st.rerun())."""
+        while True:
+            message = ForwardMsg()
+            message.ParseFromString(await asyncio.wait_for(self._socket.recv(), self.timeout))
+            kind = message.WhichOneof("type")
+            if kind == "new_session" and not message.new_session.fragment_ids_this_run:
+                self.widgets = {}  # A full run draws the whole page again
+                self._auto_reruns = {}
+            elif kind == "delta" and message.delta.WhichOneof("type") == "new_element":
+                self._apply(message.delta.new_element)
+            elif kind == "auto_rerun":
+                self._auto_reruns[message.auto_rerun.fragment_id] = message.auto_rerun.interval
+            elif kind == "stop_auto_rerun":
+                for fragment_id in message.stop_auto_rerun.fragment_ids:
+                    self._auto_reruns.pop(fragment_id, None)
+            elif kind == "script_finished" and message.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return
+
+    def _apply(self, element):
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            raise RuntimeError(f"{element.exception.type}: {element.exception.message}")
+        widget = getattr(element, kind)
+        widget_id = getattr(widget, "id", None)
+        if isinstance(widget_id, str) and widget_id.startswith("$$ID-"):
+            key = widget_id.split("-", 2)[2]  # "$$ID-<hash>-<key>", and "None" without a key
+            self.widgets[kind if key == "None" else key] = widget
@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# --- Startup and per-rerun cost of chatbot.py ---
+# Each measurement runs in a fresh interpreter: the first AppTest run is the
+# cold start (imports, configuration, model construction) and the following
+# idle reruns show the cost every widget interaction pays.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+import_s = time.perf_counter() - start
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+start = time.perf_counter()
+at.run()
+first_run_s = time.perf_counter() - start
+reruns = []
+for _ in range(int(sys.argv[2])):
+    start = time.perf_counter()
+    at.run()
+    reruns.append(time.perf_counter() - start)
+print(json.dumps({
+    "streamlit_import_s": import_s,
+    "first_run_s": first_run_s,
+    "rerun_mean_s": sum(reruns) / len(reruns),
+    "rerun_max_s": max(reruns),
+}))
+"""
+
+
+def measure(script, reruns):
+    env = dict(os.environ)
+    env.setdefault("GOOGLE_API_KEY", "fake-key")  # Startup must not depend on a real key
+    output = subprocess.check_output([sys.executable, "-c", MEASURE, script, str(reruns)], env=env, cwd=HERE)
+    return json.loads(output.splitlines()[-1])
+
+
+def script_at(revision, name):
+    """
+    Writes a script as of a git revision next to the current one, so its imports resolve.
+    Args:
+        revision (str): Any git revision, e.g. a commit hash or "HEAD~3".
+        name (str): The script's file name, e.g. "chatbot.py".
+    Returns:
+        str: Path of the copy. The caller removes it.
+    """
+    source = subprocess.check_output(["git", "show", f"{revision}:./{name}"], cwd=HERE)
+    path = os.path.join(HERE, f"_{name[:-3]}_{revision.replace('/', '_')}.py")
+    with open(path, "wb") as f:
+        f.write(source)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure chatbot.py cold start and rerun time.")
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--compare", metavar="REV", help="Also measure chatbot.py from this git revision")
+    parser.add_argument("--out", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {"current": measure(os.path.join(HERE, "chatbot.py"), args.reruns)}
+    if args.compare:
+        old_script = script_at(args.compare, "chatbot.py")
+        try:
+            results[args.compare] = measure(old_script, args.reruns)
+        finally:
+            os.remove(old_script)
+
+    for name, result in results.items():
+        print(f"{name:>12}: first run {result['first_run_s'] * 1000:.0f}ms, "
+              f"rerun mean {result['rerun_mean_s'] * 1000:.1f}ms (max {result['rerun_max_s'] * 1000:.1f}ms)")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,92 @@
+import argparse
+import random
+import time
+
+import ttt_engine
+
+# --- Per-move cost of the tic-tac-toe game core: list of strings vs bitboards ---
+# Plays the same random games with both representations (same seed, same
+# choices) and reports the cost of one move: listing the free squares, placing
+# a mark and checking for a win and a draw. The list version is the game core
+# ttt.py used before it switched to bitboards.
+
+LIST_WIN_CONDITIONS = [
+    [0, 1, 2], [3, 4, 5], [6, 7, 8],
+    [0, 3, 6], [1, 4, 7], [2, 5, 8],
+    [0, 4, 8], [2, 4, 6],
+]
+
+
+def list_check_win(board, player):
+    for condition in LIST_WIN_CONDITIONS:
+        if all(board[i] == player for i in condition):
+            return True
+    return False
+
+
+def list_check_draw(board):
+    return all(square != ' ' for square in board)
+
+
+def list_available_moves(board):
+    return [i for i, spot in enumerate(board) if spot == ' ']
+
+
+def play_list(rng):
+    """One random game on a list board. Returns (winner or None, moves played)."""
+    board = [' '] * 9
+    player = 'X'
+    moves = 0
+    while True:
+        available = list_available_moves(board)
+        board[available[rng.randrange(len(available))]] = player
+        moves += 1
+        if list_check_win(board, player):
+            return player, moves
+        if list_check_draw(board):
+            return None, moves
+        player = 'O' if player == 'X' else 'X'
+
+
+def play_bits(rng):
+    """The same game on bitboards."""
+    bits = {'X': 0, 'O': 0}
+    player = 'X'
+    moves = 0
+    while True:
+        available = ttt_engine.squares(ttt_engine.free_squares(bits['X'], bits['O']))
+        bits[player] |= 1 << available[rng.randrange(len(available))]
+        moves += 1
+        if ttt_engine.is_win(bits[player]):
+            return player, moves
+        if ttt_engine.is_full(bits['X'], bits['O']):
+            return None, moves
+        player = 'O' if player == 'X' else 'X'
+
+
+def run(play, games, seed):
+    rng = random.Random(seed)
+    outcomes = []
+    total_moves = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        winner, moves = play(rng)
+        outcomes.append(winner)
+        total_moves += moves
+    return outcomes, total_moves, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the tic-tac-toe game core.")
+    parser.add_argument("--games", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    list_outcomes, moves, list_s = run(play_list, args.games, args.seed)
+    bits_outcomes, _, bits_s = run(play_bits, args.games, args.seed)
+    if list_outcomes != bits_outcomes:
+        raise SystemExit("The two representations disagree on the outcome of a game")
+
+    print(f"{args.games} random games, {moves} moves (seed {args.seed})")
+    print(f"  list of strings: {list_s / moves * 1e9:7.0f} ns/move")
+    print(f"  bitboards:       {bits_s / moves * 1e9:7.0f} ns/move  ({list_s / bits_s:.1f}x faster)")
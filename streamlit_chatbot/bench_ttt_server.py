@@ -0,0 +1,123 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from bench_chatbot import percentile
+from bench_server import BrowserSession, cpu_seconds, serve
+from bench_startup import script_at
+
+# --- How many simultaneous tic-tac-toe games one server process sustains ---
+# Starts ttt.py under a real `streamlit run` server and connects simulated
+# players to it over the websocket, all of them sessions of that one server
+# process (see bench_server). Every player loads the page, waits for the
+# others, then clicks a free square and waits for the AI's mark, letting the
+# wait_for_ai fragment rerun as a browser would. Reported per level of
+# concurrency:
+#   * move latency: click until the AI's mark is on the board;
+#   * server CPU per move: CPU seconds of the server process (not its AI
+#     workers) divided by the moves played, which is what a blocking sleep or
+#     search on a script thread takes away from every other session.
+# The highest level whose p95 latency stays under --slo is the number of games
+# the process sustains. --compare REV measures ttt.py from a git revision too.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+AI_MARK = "⭕"
+
+
+def free_squares(session):
+    return [int(key[len("square_"):]) for key, button in session.widgets.items()
+            if key.startswith("square_") and button.label.strip() == "" and not button.disabled]
+
+
+def ai_marks(session):
+    return sum(1 for key, button in session.widgets.items() if key.startswith("square_") and button.label == AI_MARK)
+
+
+async def play(session, duration, rng):
+    """
+    Plays games for `duration` seconds.
+    Returns:
+        list: Move latencies in seconds.
+    """
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        if "play_again_button" in session.widgets:
+            await session.click("play_again_button")
+            continue
+        marks = ai_marks(session)
+        start = time.perf_counter()
+        await session.click(f"square_{rng.choice(free_squares(session))}")
+        while ai_marks(session) == marks and "play_again_button" not in session.widgets:
+            await session.tick()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def run_level(url, pid, games, args):
+    sessions = [BrowserSession(url, args.timeout) for _ in range(games)]
+    for session in sessions:
+        await session.connect()
+        if args.preset:
+            await session.select("board_preset", args.preset)
+    cpu_start = cpu_seconds(pid)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        play(session, args.duration, random.Random(args.seed + seed)) for seed, session in enumerate(sessions)
+    ))
+    elapsed = time.perf_counter() - start
+    cpu = cpu_seconds(pid) - cpu_start
+    for session in sessions:
+        await session.close()
+    latencies = [latency for result in results for latency in result]
+    return {
+        "games": games,
+        "moves": len(latencies),
+        "moves_per_s": len(latencies) / elapsed,
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "server_cpu_s_per_move": cpu / max(len(latencies), 1),
+    }
+
+
+def sweep(script, args):
+    levels = []
+    for games in (int(n) for n in args.levels.split(",")):
+        # A fresh server per level, so one level's sessions do not weigh on the next
+        with serve(script, timeout=args.timeout) as (url, pid):
+            level = asyncio.run(run_level(url, pid, games, args))
+        levels.append(level)
+        print(f"  {games:>4} games: {level['moves_per_s']:7.1f} moves/s  p50 {level['p50_s'] * 1000:6.0f}ms  "
+              f"p95 {level['p95_s'] * 1000:6.0f}ms  {level['server_cpu_s_per_move'] * 1000:6.1f}ms server CPU/move")
+    sustained = max((level["games"] for level in levels if level["p95_s"] <= args.slo), default=0)
+    print(f"  sustained: {sustained} games with p95 under {args.slo * 1000:.0f}ms")
+    return {"levels": levels, "sustained_games": sustained}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the tic-tac-toe app.")
+    parser.add_argument("--levels", default="1,4,16,64", help="Comma-separated numbers of simultaneous games")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds each level runs")
+    parser.add_argument("--preset", help='Board preset, e.g. "7x7, 5 in a row" (default 3x3)')
+    parser.add_argument("--slo", type=float, default=1.5, help="p95 move latency a level must stay under")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds allowed per script run")
+    parser.add_argument("--compare", metavar="REV", help="Also measure ttt.py from this git revision")
+    parser.add_argument("--out", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    print("current")
+    results = {"current": sweep(os.path.join(HERE, "ttt.py"), args)}
+    if args.compare:
+        old_script = script_at(args.compare, "ttt.py")
+        try:
+            print(args.compare)
+            results[args.compare] = sweep(old_script, args)
+        finally:
+            os.remove(old_script)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,100 @@
+# --- Token-budgeted conversation context for Gemini ---
+# Packs the most recent turns into a token budget and folds older turns into a
+# short running summary. Token counts are cached on the Message records and the
+# summary only grows by the turns that just fell out of the window, so a rerun
+# never re-tokenizes or re-summarizes the whole history.
+
+CHARS_PER_TOKEN = 4
+SUMMARY_LINE_CHARS = 160
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (about four characters per token for English text)."""
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+def message_tokens(message):
+    """Returns the message's token count, computing it only the first time."""
+    if message.tokens is None:
+        message.tokens = estimate_tokens(message.content)
+    return message.tokens
+
+
+def to_gemini_role(role):
+    return "model" if role == "assistant" else "user"
+
+
+def summarize_message(message):
+    """One-line extractive summary: the first sentence, shortened."""
+    text = " ".join(message.content.split())
+    sentence = text.split(". ")[0]
+    if len(sentence) > SUMMARY_LINE_CHARS:
+        sentence = sentence[:SUMMARY_LINE_CHARS - 3] + "..."
+    return f"{message.role}: {sentence}"
+
+
+class ContextBuilder:
+    """
+    Builds the `contents` list sent to Gemini for a conversation.
+    Keep one instance per session (in st.session_state) so its summary survives reruns.
+    Args:
+        token_budget (int): Maximum tokens for summary, history and prompt together.
+        summary_budget (int): Maximum tokens spent on the summary of dropped turns.
+    """
+
+    def __init__(self, token_budget=2000, summary_budget=300):
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.summary_lines = []
+        self.summary_tokens = 0
+        self.summarized = 0  # Number of leading messages already folded into the summary
+
+    def _fold(self, messages):
+        """Adds dropped messages to the summary, trimming its oldest lines to fit the budget."""
+        for message in messages:
+            line = summarize_message(message)
+            self.summary_lines.append(line)
+            self.summary_tokens += estimate_tokens("\n" + line)
+        # The budget covers the header too; counting each line with its newline keeps
+        # the estimate of the joined text within the sum
+        budget = self.summary_budget - estimate_tokens(SUMMARY_HEADER)
+        while self.summary_lines and self.summary_tokens > budget:
+            self.summary_tokens -= estimate_tokens("\n" + self.summary_lines.pop(0))
+
+    def build(self, messages):
+        """
+        Packs the conversation into the token budget.
+        Args:
+            messages (ChatHistory): Chat history; the last message is the new prompt.
+        Returns:
+            list: Gemini contents, oldest first, ending with the new prompt.
+        """
+        prompt = messages[-1]
+        # Reserve the whole summary budget, since this call may grow the summary
+        remaining = self.token_budget - message_tokens(prompt) - self.summary_budget
+
+        # Walk back from the newest turn until the budget runs out
+        floor = max(self.summarized, messages.start)
+        start = len(messages) - 1
+        while start > floor and message_tokens(messages[start - 1]) <= remaining:
+            start -= 1
+            remaining -= message_tokens(messages[start])
+
+        # Gemini expects the history to open with a user turn
+        while start < len(messages) - 1 and messages[start].role != "user":
+            start += 1
+
+        # Turns already pushed out of the history buffer are dropped unsummarized
+        if start > floor:
+            self._fold(messages[i] for i in range(floor, start))
+        self.summarized = max(self.summarized, start)
+
+        contents = [
+            {"role": to_gemini_role(messages[i].role), "parts": [messages[i].content]}
+            for i in range(start, len(messages))
+        ]
+        if self.summary_lines:
+            summary = SUMMARY_HEADER + "".join("\n" + line for line in self.summary_lines)
+            contents[0]["parts"].insert(0, summary)
+        return contents
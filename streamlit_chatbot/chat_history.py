@@ -0,0 +1,76 @@
+import json
+import os
+
+# --- Bounded chat history for st.session_state ---
+# A fixed-size ring buffer of compact message records. Messages are addressed
+# by their absolute position in the conversation; once the buffer is full the
+# oldest message is overwritten and, optionally, appended to a JSONL spill file.
+
+
+class Message:
+    """A single chat message. `tokens` caches the token estimate used by ContextBuilder."""
+
+    __slots__ = ("role", "content", "tokens")
+
+    def __init__(self, role, content):
+        self.role = role
+        self.content = content
+        self.tokens = None
+
+    def to_dict(self):
+        return {"role": self.role, "content": self.content}
+
+
+class ChatHistory:
+    """
+    Ring buffer of Message records.
+    Args:
+        capacity (int): Messages kept in memory.
+        spill_path (str): Optional JSONL file that receives messages pushed out of the buffer.
+    """
+
+    def __init__(self, capacity=200, spill_path=None):
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self.total = 0  # Messages ever appended
+        self._buffer = [None] * capacity
+
+    @property
+    def start(self):
+        """Absolute index of the oldest message still in memory."""
+        return max(0, self.total - self.capacity)
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.total
+        if not self.start <= index < self.total:
+            raise IndexError("message is no longer held in memory")
+        return self._buffer[index % self.capacity]
+
+    def append(self, role, content):
+        slot = self.total % self.capacity
+        evicted = self._buffer[slot]
+        if evicted is not None and self.spill_path:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(evicted.to_dict(), ensure_ascii=False) + "\n")
+        message = Message(role, content)
+        self._buffer[slot] = message
+        self.total += 1
+        return message
+
+    def recent(self, count):
+        """Returns the newest `count` in-memory messages, oldest first."""
+        first = max(self.start, self.total - count)
+        return [self[i] for i in range(first, self.total)]
+
+    def spilled(self):
+        """Yields the messages written to the spill file, oldest first."""
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        with open(self.spill_path, encoding="utf-8") as f:
+            for line in f:
+                data = json.loads(line)
+                yield Message(data["role"], data["content"])
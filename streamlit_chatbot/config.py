@@ -0,0 +1,62 @@
+import dataclasses
+import os
+import tomllib
+from dataclasses import dataclass
+
+# --- Chatbot settings ---
+# Read from a TOML settings file and overridden by CHATBOT_* environment
+# variables. The API key can also come from GOOGLE_API_KEY or GEMINI_API_KEY.
+
+DEFAULT_SETTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chatbot_settings.toml")
+
+
+@dataclass(frozen=True)
+class Settings:
+    api_key: str = ""
+    model_name: str = "gemini-1.5-flash"
+    fake_model: bool = False  # Answer with fake_genai instead of calling the API
+    history_size: int = 200
+    history_spill_dir: str = ""
+    cache_size: int = 512
+    cache_ttl: float = 3600
+    cache_db: str = ""
+    token_budget: int = 2000
+    summary_budget: int = 300
+
+
+def _convert(value, kind):
+    if kind is bool and isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return kind(value)
+
+
+def load_settings(path=None, environ=None):
+    """
+    Loads settings from a TOML file and the environment.
+    Args:
+        path (str): Settings file. Defaults to $CHATBOT_SETTINGS or chatbot_settings.toml
+            next to this module; a missing file is ignored.
+        environ (dict): Environment to read. Defaults to os.environ.
+    Returns:
+        Settings: The merged settings.
+    """
+    environ = os.environ if environ is None else environ
+    path = path or environ.get("CHATBOT_SETTINGS") or DEFAULT_SETTINGS_FILE
+    values = {}
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            values.update(tomllib.load(f))
+
+    api_key = environ.get("GOOGLE_API_KEY") or environ.get("GEMINI_API_KEY")
+    if api_key:
+        values["api_key"] = api_key
+    for field in dataclasses.fields(Settings):
+        name = f"CHATBOT_{field.name.upper()}"
+        if name in environ:
+            values[field.name] = environ[name]
+
+    kinds = {field.name: field.type for field in dataclasses.fields(Settings)}
+    unknown = set(values) - set(kinds)
+    if unknown:
+        raise ValueError(f"Unknown chatbot settings: {', '.join(sorted(unknown))}")
+    return Settings(**{name: _convert(value, kinds[name]) for name, value in values.items()})
@@ -0,0 +1,101 @@
+import asyncio
+import sys
+import time
+import types
+
+# --- Offline stand-in for google.generativeai models ---
+# Yields canned text on a timer so the chatbot can be exercised without an API key.
+
+
+class FakeChunk:
+    """A single streamed piece of a response, shaped like a Gemini response chunk."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeStream:
+    """
+    Iterable response returned by FakeGenerativeModel when stream=True.
+    Each chunk is released only after its delay has passed, like a real network stream.
+    """
+
+    def __init__(self, words, first_token_delay, chunk_delay):
+        self._words = words
+        self._first_token_delay = first_token_delay
+        self._chunk_delay = chunk_delay
+        self.text = " ".join(words)
+
+    def __iter__(self):
+        for i, word in enumerate(self._words):
+            time.sleep(self._first_token_delay if i == 0 else self._chunk_delay)
+            yield FakeChunk(word if i == 0 else " " + word)
+
+
+class FakeAsyncStream(FakeStream):
+    """Async-iterable response returned by generate_content_async when stream=True."""
+
+    async def __aiter__(self):
+        for i, word in enumerate(self._words):
+            await asyncio.sleep(self._first_token_delay if i == 0 else self._chunk_delay)
+            yield FakeChunk(word if i == 0 else " " + word)
+
+
+class FakeGenerativeModel:
+    """
+    Drop-in replacement for genai.GenerativeModel used for local testing.
+    Args:
+        model_name (str): Name reported by the fake model.
+        reply (str): Text to answer with. Defaults to echoing the prompt.
+        first_token_delay (float): Seconds before the first chunk arrives.
+        chunk_delay (float): Seconds between the following chunks.
+    """
+
+    def __init__(self, model_name="fake-model", reply=None, first_token_delay=0.5, chunk_delay=0.05):
+        self.model_name = model_name
+        self.reply = reply
+        self.first_token_delay = first_token_delay
+        self.chunk_delay = chunk_delay
+
+    def _words_for(self, prompt):
+        if not isinstance(prompt, str):
+            # Multi-turn contents: answer the last part of the last turn
+            prompt = prompt[-1]["parts"][-1]
+        text = self.reply if self.reply is not None else f"You said: {prompt}"
+        return text.split() or [""]
+
+    def generate_content(self, prompt, stream=False):
+        words = self._words_for(prompt)
+        response = FakeStream(words, self.first_token_delay, self.chunk_delay)
+        if stream:
+            return response
+        # Blocking call: wait for the whole reply, as the real client does
+        time.sleep(self.first_token_delay + self.chunk_delay * (len(words) - 1))
+        return response
+
+    async def generate_content_async(self, prompt, stream=False):
+        words = self._words_for(prompt)
+        if stream:
+            return FakeAsyncStream(words, self.first_token_delay, self.chunk_delay)
+        await asyncio.sleep(self.first_token_delay + self.chunk_delay * (len(words) - 1))
+        return FakeStream(words, self.first_token_delay, self.chunk_delay)
+
+
+def install(first_token_delay=0.5, chunk_delay=0.05):
+    """
+    Registers this fake as `google.generativeai` in sys.modules, so scripts that
+    import genai (e.g. chatbot.py under AppTest) get fake models instead.
+    """
+    genai = types.ModuleType("google.generativeai")
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = lambda model_name="fake-model", **kwargs: FakeGenerativeModel(
+        model_name, first_token_delay=first_token_delay, chunk_delay=chunk_delay
+    )
+    try:
+        import google  # Namespace package shared with google.protobuf, which Streamlit needs
+    except ImportError:
+        google = types.ModuleType("google")
+    google.generativeai = genai
+    sys.modules["google"] = google
+    sys.modules["google.generativeai"] = genai
+    return genai
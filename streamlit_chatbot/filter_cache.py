@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+# --- Content-addressed cache of filtered images ---
+# Results are keyed by the SHA-256 of the uploaded bytes plus the filter name
+# and its parameters, so the same picture filtered the same way is computed
+# once per process no matter which session uploads it. The memory tier is an
+# LRU bounded by decoded image size; an optional directory of PNG files keeps
+# results across restarts.
+
+
+def content_digest(data):
+    """SHA-256 hex digest of the uploaded file's bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_key(digest, name, **params):
+    """
+    Builds a cache key.
+    Args:
+        digest (str): content_digest of the source image.
+        name (str or list): Filter name, or the filter chain.
+        params: Anything else the result depends on, e.g. backend="NumPy".
+    """
+    payload = json.dumps([digest, name, params], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def image_nbytes(image):
+    return image.width * image.height * len(image.getbands())
+
+
+class ImageCache:
+    """
+    Memory-bounded LRU of PIL images with an optional on-disk tier.
+    Args:
+        max_bytes (int): Budget for decoded pixels held in memory.
+        disk_dir (str): Optional directory for PNG copies of every entry.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 * 1024, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.current_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key + ".png")
+
+    def _remember(self, key, image):
+        size = image_nbytes(image)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= image_nbytes(self._entries.pop(key))
+            self._entries[key] = image
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= image_nbytes(evicted)
+                self.evictions += 1
+
+    def get(self, key):
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return image
+        if self.disk_dir and os.path.exists(self._disk_path(key)):
+            image = Image.open(self._disk_path(key))
+            image.load()
+            self._remember(key, image)
+            with self._lock:
+                self.hits += 1
+                self.disk_hits += 1
+            return image
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, image):
+        self._remember(key, image)
+        if self.disk_dir:
+            # Write to a temporary name first so readers never see a partial file
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            image.save(tmp_path, format="PNG")
+            os.replace(tmp_path, path)
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached image for `key`, calling compute() and storing its result on a miss."""
+        image = self.get(key)
+        if image is None:
+            image = compute()
+            self.set(key, image)
+        return image
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "memory_mb": self.current_bytes / (1024 * 1024),
+        }
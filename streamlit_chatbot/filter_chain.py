@@ -0,0 +1,155 @@
+import time
+
+from PIL import ImageChops
+
+from filter_engine import KERNEL_RADIUS, apply_filter
+
+# --- Filter chains with operator fusion ---
+# A chain such as Blur -> Grayscale -> Blur -> Edge Enhance is planned before it
+# runs:
+#   * repeated Grayscale steps collapse into one (grayscale is idempotent);
+#   * Grayscale moves ahead of Blur steps, so they work on one channel
+#     instead of three (blur is linear, so the order only changes rounding);
+#   * on the NumPy backend a run of Blurs and the kernel step that follows it
+#     become one convolution (filter_numpy.apply_fused). Blur weights are
+#     positive and sum to one, so the run never needs the clipping PIL does
+#     after every step; only the last step of a fused run may clip or add an
+#     offset, and the whole run is rounded and stored as uint8 just once.
+# Fused steps differ from step-by-step filtering only in rounding: the
+# outermost band of pixels, which PIL leaves unfiltered at each step, is
+# filtered step by step (see apply_fused). compare_plans reports the largest
+# difference.
+
+KERNEL_FILTERS = ("Blur", "Contour", "Edge Enhance")
+
+
+class Step:
+    """
+    One operation of a planned chain, covering one or more of the chain's filters.
+    """
+
+    __slots__ = ("names",)
+
+    def __init__(self, names):
+        self.names = names
+
+    @property
+    def fused(self):
+        return len(self.names) > 1
+
+    def __repr__(self):
+        label = " + ".join(self.names)
+        return f"fused({label})" if self.fused else label
+
+
+def _reorder(chain):
+    """Drops repeated Grayscale steps and moves Grayscale ahead of the Blurs before it."""
+    ordered = []
+    for name in chain:
+        if name == "Grayscale":
+            if "Grayscale" in ordered:
+                continue
+            position = len(ordered)
+            while position > 0 and ordered[position - 1] == "Blur":
+                position -= 1
+            ordered.insert(position, name)
+        else:
+            ordered.append(name)
+    return ordered
+
+
+def plan_chain(chain, backend="PIL"):
+    """
+    Plans a filter chain.
+    Args:
+        chain (list): Filter names in the order the user picked them.
+        backend (str): Kernel fusion needs the "NumPy" backend (PIL only runs 3x3 and 5x5 kernels).
+    Returns:
+        list: Steps to execute in order.
+    """
+    plan = []
+    run = []  # Kernel steps waiting to be fused
+    for name in _reorder(chain):
+        if backend == "NumPy" and name in KERNEL_FILTERS:
+            run.append(name)
+            if name != "Blur":  # A clipping kernel has to end the run
+                plan.append(Step(tuple(run)))
+                run = []
+            continue
+        if run:
+            plan.append(Step(tuple(run)))
+            run = []
+        plan.append(Step((name,)))
+    if run:
+        plan.append(Step(tuple(run)))
+    return plan
+
+
+def chain_radius(chain):
+    """Pixels of context the whole chain reads around each output pixel."""
+    return sum(KERNEL_RADIUS[name] for name in chain)
+
+
+def run_plan(image, plan, backend="PIL"):
+    """Executes a planned chain on a PIL image."""
+    if backend != "NumPy":
+        for step in plan:
+            image = apply_filter(image, step.names[0], backend)
+        return image
+
+    import filter_numpy
+    pixels = filter_numpy.to_array(image)
+    for step in plan:
+        if step.fused:
+            pixels = filter_numpy.apply_fused(pixels, step.names)
+        else:
+            pixels = filter_numpy.ARRAY_FILTERS[step.names[0]](pixels)
+    return filter_numpy.from_array(pixels)
+
+
+def run_chain(image, chain, backend="PIL"):
+    """Plans and runs a chain of filters (or a single filter name)."""
+    if isinstance(chain, str):
+        chain = [chain]
+    return run_plan(image, plan_chain(chain, backend), backend)
+
+
+def intermediate_bytes(image, steps):
+    """Bytes of the images a sequence of steps allocates (one output per step)."""
+    bands = len(image.getbands())
+    total = 0
+    for step in steps:
+        if "Grayscale" in step.names:
+            bands = 1
+        total += image.width * image.height * bands
+    return total
+
+
+def compare_plans(image, chain, backend="PIL"):
+    """
+    Runs a chain step by step and as planned.
+    Returns:
+        dict: Time and intermediate-image memory of both, the planned steps and the
+            largest per-pixel difference between the two outputs, in levels.
+    """
+    naive = [Step((name,)) for name in chain]
+    plan = plan_chain(chain, backend)
+
+    start = time.perf_counter()
+    naive_image = run_plan(image, naive, backend)
+    naive_s = time.perf_counter() - start
+    start = time.perf_counter()
+    planned_image = run_plan(image, plan, backend)
+    planned_s = time.perf_counter() - start
+    extrema = ImageChops.difference(naive_image, planned_image).getextrema()
+    if naive_image.getbands() == ("L",):
+        extrema = (extrema,)
+
+    return {
+        "plan": [repr(step) for step in plan],
+        "naive_s": naive_s,
+        "planned_s": planned_s,
+        "naive_mb": intermediate_bytes(image, naive) / (1024 * 1024),
+        "planned_mb": intermediate_bytes(image, plan) / (1024 * 1024),
+        "max_diff": max(high for _, high in extrema),
+    }
@@ -0,0 +1,144 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageFilter, ImageOps
+
+# --- Tiled, multi-core filter engine for the image filter app ---
+# Large images are cut into tiles that overlap by the filter kernel's radius,
+# filtered on a process pool and pasted back. Every output pixel is computed
+# from the same neighbourhood as in a single PIL call, so the result is
+# pixel-identical to filtering the whole image at once.
+
+FILTER_NAMES = ["Grayscale", "Blur", "Contour", "Edge Enhance"]
+
+# Pixels of context each filter reads on every side of an output pixel
+KERNEL_RADIUS = {
+    "Grayscale": 0,
+    "Blur": 2,           # 5x5 kernel
+    "Contour": 1,        # 3x3 kernel
+    "Edge Enhance": 1,   # 3x3 kernel
+}
+
+TILE_SIZE = 1024
+MIN_TILED_PIXELS = 2 * TILE_SIZE * TILE_SIZE  # Smaller images are not worth the process round trip
+
+BACKEND_NAMES = ["PIL", "NumPy"]
+
+_executors = {}
+
+
+def normalize_mode(image):
+    """
+    Converts palette, bilevel, CMYK and other images to a mode PIL can filter.
+    Images with an alpha band (LA, PA) or palette transparency become RGBA, the rest RGB.
+    """
+    if image.mode in ("L", "RGB", "RGBA"):
+        return image
+    has_alpha = "A" in image.getbands() or "transparency" in image.info
+    return image.convert("RGBA" if has_alpha else "RGB")
+
+
+def apply_filter(image, name, backend="PIL"):
+    """
+    Applies a filter to a whole image in one call.
+    Args:
+        image (PIL.Image): The image to filter.
+        name (str): One of FILTER_NAMES.
+        backend (str): "PIL" for PIL's own filters or "NumPy" for filter_numpy.
+    Returns:
+        PIL.Image: The filtered image.
+    """
+    if backend == "NumPy":
+        import filter_numpy
+        return filter_numpy.apply_filter(image, name)
+    elif backend != "PIL":
+        raise ValueError(f"Unknown backend: {backend}")
+
+    if name == "Grayscale":
+        return ImageOps.grayscale(image)
+    elif name == "Blur":
+        return image.filter(ImageFilter.BLUR)
+    elif name == "Contour":
+        return image.filter(ImageFilter.CONTOUR)
+    elif name == "Edge Enhance":
+        return image.filter(ImageFilter.EDGE_ENHANCE)
+    raise ValueError(f"Unknown filter: {name}")
+
+
+def _spans(length, tile_size):
+    """Cuts [0, length) into runs of tile_size, folding a short remainder into the last run."""
+    edges = list(range(0, length, tile_size)) + [length]
+    if len(edges) > 2 and edges[-1] - edges[-2] < tile_size // 4:
+        del edges[-2]
+    return list(zip(edges, edges[1:]))
+
+
+def plan_tiles(width, height, tile_size, radius):
+    """
+    Splits an image into overlapping tiles.
+    Returns:
+        list: (source_box, crop_box, paste_position) per tile. source_box is the
+            region to filter (tile plus overlap), crop_box the part of the filtered
+            region to keep and paste_position where it goes in the output.
+    """
+    tiles = []
+    for top, bottom in _spans(height, tile_size):
+        for left, right in _spans(width, tile_size):
+            src_left, src_top = max(0, left - radius), max(0, top - radius)
+            src_right, src_bottom = min(width, right + radius), min(height, bottom + radius)
+            crop = (left - src_left, top - src_top, right - src_left, bottom - src_top)
+            tiles.append(((src_left, src_top, src_right, src_bottom), crop, (left, top)))
+    return tiles
+
+
+def _filter_tile(tile, chain, backend, crop):
+    from filter_chain import run_chain
+    return run_chain(tile, chain, backend).crop(crop)
+
+
+def get_executor(workers=None):
+    """Returns a process pool with `workers` processes, created once per process and size."""
+    workers = workers or os.cpu_count() or 1
+    if workers not in _executors:
+        # spawn: forking a threaded server (Streamlit) is not safe
+        _executors[workers] = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    return _executors[workers]
+
+
+def filter_tiled(image, chain, backend="PIL", workers=None, tile_size=TILE_SIZE, executor=None):
+    """
+    Applies a filter, or a chain of filters, tile by tile on a process pool.
+    Args:
+        image (PIL.Image): The image to filter.
+        chain (str or list): One of FILTER_NAMES, or several to apply in order.
+        backend (str): One of BACKEND_NAMES.
+        workers (int): Processes to use. Defaults to the number of cores.
+        tile_size (int): Edge length of a tile before overlap.
+        executor (Executor): Pool to use instead of the shared one.
+    Returns:
+        PIL.Image: The same pixels as filter_chain.run_chain(image, chain, backend).
+    """
+    from filter_chain import chain_radius, run_chain
+
+    if isinstance(chain, str):
+        chain = [chain]
+    width, height = image.size
+    if width * height < MIN_TILED_PIXELS or workers == 1:
+        return run_chain(image, chain, backend)
+
+    executor = executor or get_executor(workers)
+    # Each step reads its radius beyond the last, so the overlap is the chain's total radius
+    tiles = plan_tiles(width, height, tile_size, chain_radius(chain))
+    futures = [
+        (executor.submit(_filter_tile, image.crop(source), chain, backend, crop), position)
+        for source, crop, position in tiles
+    ]
+
+    output = None
+    for future, position in futures:
+        piece = future.result()
+        if output is None:
+            output = Image.new(piece.mode, image.size)
+        output.paste(piece, position)
+    return output
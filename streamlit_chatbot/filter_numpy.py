@@ -0,0 +1,169 @@
+import numpy as np
+from PIL import Image
+
+# --- NumPy implementations of the image filters ---
+# Whole-array versions of PIL's Grayscale, Blur, Contour and Edge Enhance.
+# All three kernels are built from box sums, which are separable: a box sum is
+# a sum of shifted rows followed by one of shifted columns. Single steps work
+# in int16 (a 5x5 box of uint8 is at most 6375) and round with integer shifts,
+# so no float or 32-bit temporaries of the whole image are made. Like PIL, the
+# kernel filters leave the outermost `radius` pixels of the image unchanged.
+#
+# Results match PIL pixel for pixel. On a 2048x2048 RGB image Blur, Contour
+# and Edge Enhance run 2-3x faster than PIL, but Grayscale is about 5x slower:
+# PIL does it in one pass, NumPy needs one pass per channel (bench_backends.py).
+
+GRAYSCALE_ROWS = 32
+
+
+def to_array(image):
+    return np.asarray(image)
+
+
+def from_array(array):
+    """uint8 arrays map back to L, RGB or RGBA by their shape."""
+    return Image.fromarray(array)
+
+
+def grayscale(pixels):
+    """ITU-R 601-2 luma with PIL's integer weights: (19595 R + 38470 G + 7471 B) / 65536."""
+    if pixels.ndim == 2:
+        return pixels.copy()
+    out = np.empty(pixels.shape[:2], np.uint8)
+    # A few rows at a time, so the uint32 accumulator stays in cache
+    for top in range(0, pixels.shape[0], GRAYSCALE_ROWS):
+        rows = pixels[top:top + GRAYSCALE_ROWS]
+        luma = np.multiply(rows[..., 0], 19595, dtype=np.uint32)
+        luma += np.multiply(rows[..., 1], 38470, dtype=np.uint32)
+        luma += np.multiply(rows[..., 2], 7471, dtype=np.uint32)
+        luma += 0x8000
+        luma >>= 16
+        out[top:top + GRAYSCALE_ROWS] = luma
+    return out
+
+
+def box_sum(pixels, radius, dtype=np.int16):
+    """
+    Sum over every (2r+1) x (2r+1) window that fits inside the image.
+    `dtype` must hold (2r+1)^2 times the largest input value.
+    Returns:
+        ndarray: Array of `dtype` shrunk by `radius` on every side.
+    """
+    width = 2 * radius + 1
+    height, length = pixels.shape[:2]
+    rows = pixels[:height - width + 1].astype(dtype)
+    for shift in range(1, width):
+        rows += pixels[shift:height - width + 1 + shift]
+    total = rows[:, :length - width + 1].copy()
+    for shift in range(1, width):
+        total += rows[:, shift:length - width + 1 + shift]
+    return total
+
+
+def _finish(pixels, filtered, radius, divisor, offset):
+    """
+    Scales, rounds and clips the interior in place, keeping the border pixels as they were.
+    `divisor` is a power of two, so round-half-up division is an add and a shift.
+    """
+    out = pixels.copy()
+    if divisor > 1:
+        filtered += divisor // 2
+        filtered >>= divisor.bit_length() - 1
+    if offset:
+        filtered += offset
+    out[radius:-radius, radius:-radius] = np.clip(filtered, 0, 255, out=filtered)
+    return out
+
+
+def _run_steps(pixels, names):
+    for name in names:
+        pixels = ARRAY_FILTERS[name](pixels)
+    return pixels
+
+
+def apply_fused(pixels, names):
+    """
+    Applies a run of kernel filters as one linear operator.
+    Every step but the last must be Blur. The steps are evaluated on an int32
+    accumulator (int64 for long runs) with box sums, so nothing is rounded,
+    clipped or converted back to uint8 between them; the combined divisor and
+    the last step's offset are applied once at the end.
+    The fused kernel only reaches the pixels at least the summed radii from the
+    edge. The outer band is filled by running the steps one by one on strips
+    twice as wide as the band, so it matches step-by-step filtering exactly.
+    Images too small for the combined kernel are filtered step by step instead.
+    """
+    radius = 2 * (len(names) - 1) + (2 if names[-1] == "Blur" else 1)
+    if min(pixels.shape[:2]) <= 2 * radius:
+        return _run_steps(pixels, names)
+    # Each Blur multiplies the range by 16 and the last step by at most 11
+    dtype = np.int32 if 255 * 16 ** names.count("Blur") * 11 < 2 ** 31 else np.int64
+    total = pixels.astype(dtype)
+    divisor = 1
+    offset = 0
+    for name in names:
+        if name == "Blur":
+            total = box_sum(total, 2, dtype) - box_sum(total, 1, dtype)[1:-1, 1:-1]
+            divisor *= 16
+        elif name == "Contour":
+            total = 9 * total[1:-1, 1:-1] - box_sum(total, 1, dtype)
+            offset = 255
+        elif name == "Edge Enhance":
+            total = 11 * total[1:-1, 1:-1] - box_sum(total, 1, dtype)
+            divisor *= 2
+    out = _finish(pixels, total, radius, divisor, offset)
+
+    # A strip's own cut edge only spoils the `radius` pixels next to it
+    band = 2 * radius
+    out[:radius] = _run_steps(pixels[:band], names)[:radius]
+    out[-radius:] = _run_steps(pixels[-band:], names)[-radius:]
+    out[:, :radius] = _run_steps(pixels[:, :band], names)[:, :radius]
+    out[:, -radius:] = _run_steps(pixels[:, -band:], names)[:, -radius:]
+    return out
+
+
+def blur(pixels):
+    """PIL's BLUR: a 5x5 ring of ones / 16, i.e. the 5x5 box minus the inner 3x3 box."""
+    if min(pixels.shape[:2]) < 5:
+        return pixels.copy()
+    ring = box_sum(pixels, 2)
+    ring -= box_sum(pixels, 1)[1:-1, 1:-1]
+    return _finish(pixels, ring, 2, 16, 0)
+
+
+def contour(pixels):
+    """PIL's CONTOUR: 8 * center - neighbours + 255 = 9 * center - 3x3 box + 255."""
+    if min(pixels.shape[:2]) < 3:
+        return pixels.copy()
+    filtered = np.multiply(pixels[1:-1, 1:-1], 9, dtype=np.int16)
+    filtered -= box_sum(pixels, 1)
+    return _finish(pixels, filtered, 1, 1, 255)
+
+
+def edge_enhance(pixels):
+    """PIL's EDGE_ENHANCE: (10 * center - neighbours) / 2 = (11 * center - 3x3 box) / 2."""
+    if min(pixels.shape[:2]) < 3:
+        return pixels.copy()
+    filtered = np.multiply(pixels[1:-1, 1:-1], 11, dtype=np.int16)
+    filtered -= box_sum(pixels, 1)
+    return _finish(pixels, filtered, 1, 2, 0)
+
+
+ARRAY_FILTERS = {
+    "Grayscale": grayscale,
+    "Blur": blur,
+    "Contour": contour,
+    "Edge Enhance": edge_enhance,
+}
+
+
+def apply_filter(image, name):
+    """
+    NumPy counterpart of filter_engine.apply_filter.
+    Args:
+        image (PIL.Image): An L, RGB or RGBA image.
+        name (str): One of the filter names.
+    Returns:
+        PIL.Image: The filtered image.
+    """
+    return from_array(ARRAY_FILTERS[name](to_array(image)))
@@ -0,0 +1,357 @@
+import os
+import resource
+import shutil
+import struct
+import sys
+import tempfile
+import weakref
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+from filter_engine import _filter_tile, _spans, get_executor, normalize_mode
+
+# --- Memory-bounded I/O for very large images ---
+# Uploads are spooled to a temporary file in chunks and read back one
+# horizontal strip at a time. Uncompressed formats (BMP, PPM/PGM, raw TIFF)
+# are memory-mapped with NumPy, so a strip costs only its own rows; compressed
+# formats (PNG, JPEG) still have to be decoded in one piece, which is a limit
+# of their codecs. Filtered strips go straight into a streaming PNG encoder, so
+# the full-resolution result never exists in memory either.
+
+SPOOL_CHUNK = 1024 * 1024
+STRIP_MB = int(os.environ.get("IMAGE_STRIP_MB", 32))  # Pixel budget per strip; the memory cap knob
+MIN_STRIP_ROWS = 16
+
+# rawmode -> (bytes per pixel in the file, channel order of the PIL mode)
+_RAW_LAYOUTS = {
+    "L": (1, [0]),
+    "RGB": (3, [0, 1, 2]),
+    "RGBA": (4, [0, 1, 2, 3]),
+    "RGBX": (4, [0, 1, 2]),
+    "BGR": (3, [2, 1, 0]),
+    "BGRA": (4, [2, 1, 0, 3]),
+    "BGRX": (4, [2, 1, 0]),
+}
+
+_PNG_COLOR_TYPES = {"L": 0, "RGB": 2, "RGBA": 6}
+
+
+def spool(file_obj, directory=None):
+    """
+    Copies a file-like object (e.g. a Streamlit upload) to a temporary file in chunks.
+    Returns:
+        str: Path of the temporary file. The caller removes it.
+    """
+    suffix = os.path.splitext(getattr(file_obj, "name", ""))[1]
+    handle, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+    with os.fdopen(handle, "wb") as spooled:
+        file_obj.seek(0)
+        shutil.copyfileobj(file_obj, spooled, SPOOL_CHUNK)
+    return path
+
+
+@contextmanager
+def spooled_upload(file_obj, directory=None):
+    """Spools a file-like object for the duration of a with block."""
+    path = spool(file_obj, directory)
+    try:
+        yield path
+    finally:
+        os.remove(path)
+
+
+def _remove_if_present(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class TempFile:
+    """
+    An empty temporary file that outlives the current script run.
+    It is removed by remove(), or once nothing refers to it any more (for
+    instance when the Streamlit session holding it ends) or the process exits.
+    """
+
+    def __init__(self, suffix="", directory=None):
+        handle, self.path = tempfile.mkstemp(suffix=suffix, dir=directory)
+        os.close(handle)
+        self._finalizer = weakref.finalize(self, _remove_if_present, self.path)
+
+    def read(self):
+        """Reads the whole file. Hand the method itself to st.download_button to read only on click."""
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def remove(self):
+        self._finalizer()
+
+
+def _raw_segments(image):
+    """
+    Memory-maps the pixel data of an uncompressed image file.
+    Returns:
+        list: (top, bottom, rows, channels) per stored strip, where rows is a
+            (height, width, bytes per pixel) view of the file, or None if the
+            format is compressed or laid out in a way this cannot map.
+    """
+    if image.mode not in _PNG_COLOR_TYPES or not image.filename:
+        return None
+    width = image.width
+    segments = []
+    for decoder, box, offset, args in image.tile:
+        if not isinstance(args, tuple):
+            args = (args,)
+        rawmode, stride, ystep = (args + (0, 1))[:3]
+        layout = _RAW_LAYOUTS.get(rawmode)
+        if decoder != "raw" or box[0] != 0 or box[2] != width or layout is None:
+            return None
+        pixel_bytes, channels = layout
+        if len(channels) != len(image.getbands()):
+            return None
+        height = box[3] - box[1]
+        stride = stride or width * pixel_bytes
+        rows = np.memmap(image.filename, dtype=np.uint8, mode="r", offset=offset, shape=(height, stride))
+        if ystep == -1:  # Bottom-up rows, as in BMP
+            rows = rows[::-1]
+        rows = rows[:, :width * pixel_bytes].reshape(height, width, pixel_bytes)
+        segments.append((box[1], box[3], rows, channels))
+    return segments
+
+
+def is_mappable(image):
+    """True if an opened (not yet loaded) image can be read strip by strip from its file."""
+    return _raw_segments(image) is not None
+
+
+class StripReader:
+    """
+    Reads an image file in horizontal strips.
+    Uncompressed files are memory-mapped; anything else is decoded once on open.
+    Args:
+        path (str): The image file.
+    """
+
+    def __init__(self, path):
+        self.image = Image.open(path)
+        self.segments = _raw_segments(self.image)
+        if self.segments is None:
+            self.image.load()
+            self.image = normalize_mode(self.image)
+        self.size = self.image.size
+        self.mode = self.image.mode
+
+    @property
+    def mapped(self):
+        return self.segments is not None
+
+    def read(self, top, bottom):
+        """Returns rows [top, bottom) as a PIL image."""
+        if self.segments is None:
+            return self.image.crop((0, top, self.size[0], bottom))
+        parts = []
+        for seg_top, seg_bottom, rows, channels in self.segments:
+            low, high = max(top, seg_top), min(bottom, seg_bottom)
+            if low < high:
+                # Indexing the channels copies just these rows out of the mapping
+                parts.append(rows[low - seg_top:high - seg_top, :, channels])
+        pixels = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        if pixels.shape[2] == 1:
+            pixels = pixels[:, :, 0]
+        return Image.fromarray(np.ascontiguousarray(pixels))
+
+    def close(self):
+        self.segments = None
+        self.image.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def strip_rows(width, budget_mb=STRIP_MB):
+    """Rows per strip so one strip stays within budget_mb (PIL holds 4 bytes per pixel)."""
+    return max(MIN_STRIP_ROWS, budget_mb * 1024 * 1024 // (4 * max(width, 1)))
+
+
+def _filter_strip(strip, chain, backend, crop):
+    """Runs in a worker: filters one strip and reports the worker's peak RSS for it."""
+    with PeakRSS() as rss:
+        result = _filter_tile(strip, chain, backend, crop)
+    return result, rss.peak_mb
+
+
+def filter_strips(reader, chain, backend="PIL", workers=None, rows=None, stats=None):
+    """
+    Filters an image strip by strip, yielding the results top to bottom.
+    At most two strips per worker are in flight, so memory use depends on the
+    strip size and the number of workers, not on the image size.
+    Args:
+        reader (StripReader): The source image.
+        chain (list): Filter names applied in order.
+        backend (str): Filter backend name.
+        workers (int): Worker processes; 1 filters in this process.
+        rows (int): Rows per strip. Defaults to strip_rows(width).
+        stats (dict): If given, receives "worker_peak_rss_mb".
+    Yields:
+        PIL.Image: Filtered strips, full width.
+    """
+    from filter_chain import chain_radius
+
+    if isinstance(chain, str):
+        chain = [chain]
+    width, height = reader.size
+    radius = chain_radius(chain)
+    rows = rows or strip_rows(width)
+    # Each strip reads `radius` extra rows on both sides and keeps only its own
+    strips = []
+    for top, bottom in _spans(height, rows):
+        source_top, source_bottom = max(0, top - radius), min(height, bottom + radius)
+        strips.append((source_top, source_bottom, (0, top - source_top, width, bottom - source_top)))
+
+    if workers == 1:
+        for source_top, source_bottom, crop in strips:
+            yield _filter_tile(reader.read(source_top, source_bottom), chain, backend, crop)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    executor = get_executor(workers)
+    worker_peak = 0.0
+    pending = []
+    for source_top, source_bottom, crop in strips:
+        pending.append(executor.submit(_filter_strip, reader.read(source_top, source_bottom), chain, backend, crop))
+        if len(pending) >= 2 * workers:
+            strip, peak = pending.pop(0).result()
+            worker_peak = max(worker_peak, peak)
+            yield strip
+    for future in pending:
+        strip, peak = future.result()
+        worker_peak = max(worker_peak, peak)
+        yield strip
+    if stats is not None:
+        stats["worker_peak_rss_mb"] = worker_peak
+
+
+class PNGWriter:
+    """
+    Encodes a PNG from strips written top to bottom, holding one strip at a time.
+    Rows use PNG's Sub filter, which suits photographs and is cheap to compute.
+    Args:
+        file (file): Binary file to write to.
+        size (tuple): Width and height of the whole image.
+        level (int): zlib compression level.
+    """
+
+    def __init__(self, file, size, level=6):
+        self.file = file
+        self.size = size
+        self.mode = None
+        self._compressor = zlib.compressobj(level)
+
+    def _chunk(self, kind, data):
+        self.file.write(struct.pack(">I", len(data)) + kind + data)
+        self.file.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    def write(self, strip):
+        if self.mode is None:
+            self.mode = strip.mode
+            self.file.write(b"\x89PNG\r\n\x1a\n")
+            self._chunk(b"IHDR", struct.pack(">IIBBBBB", *self.size, 8, _PNG_COLOR_TYPES[strip.mode], 0, 0, 0))
+        pixels = np.asarray(strip).reshape(strip.height, -1)
+        bands = len(strip.getbands())
+        filtered = np.empty((strip.height, pixels.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = 1  # Sub: each byte minus the same channel of the pixel to its left
+        filtered[:, 1:bands + 1] = pixels[:, :bands]
+        np.subtract(pixels[:, bands:], pixels[:, :-bands], out=filtered[:, bands + 1:])
+        data = self._compressor.compress(filtered.tobytes())
+        if data:
+            self._chunk(b"IDAT", data)
+
+    def close(self):
+        self._chunk(b"IDAT", self._compressor.flush())
+        self._chunk(b"IEND", b"")
+
+
+def render_png(path, chain, backend, output, workers=None, stats=None):
+    """
+    Filters an image file at full resolution into a PNG file, strip by strip.
+    Args:
+        path (str): Source image file.
+        chain (list): Filter names applied in order.
+        backend (str): Filter backend name.
+        output (str): PNG file to write.
+        workers (int): Worker processes; 1 filters in this process.
+        stats (dict): If given, receives "mapped" and "worker_peak_rss_mb".
+    """
+    with StripReader(path) as reader, open(output, "wb") as file:
+        writer = PNGWriter(file, reader.size)
+        for strip in filter_strips(reader, chain, backend, workers, stats=stats):
+            writer.write(strip)
+        writer.close()
+        if stats is not None:
+            stats["mapped"] = reader.mapped
+
+
+def reduce_strips(reader, max_size):
+    """Shrinks an image read strip by strip by whole-pixel box averaging, then fits it in max_size."""
+    width, height = reader.size
+    factor = max(1, min(width // max_size[0], height // max_size[1]))
+    rows = max(factor, strip_rows(width) // factor * factor)  # Whole blocks per strip
+    output = Image.new(reader.mode, (-(-width // factor), -(-height // factor)))
+    for top, bottom in _spans(height, rows):
+        output.paste(reader.read(top, bottom).reduce(factor), (0, top // factor))
+    output.thumbnail(max_size)
+    return output
+
+
+def current_rss_mb():
+    """Resident set size of this process right now, in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process, in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class PeakRSS:
+    """
+    Measures the peak RSS of this process while a block runs.
+    On Linux the high-water mark is reset on entry (via /proc/self/clear_refs);
+    elsewhere peak_mb is the peak since the process started. The mark is
+    process-wide, so requests running at the same time share it.
+    """
+
+    def __enter__(self):
+        try:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")
+        except OSError:
+            pass
+        self.start_mb = current_rss_mb()
+        self.peak_mb = None
+        return self
+
+    def __exit__(self, *exc_info):
+        self.peak_mb = peak_rss_mb()
+        return False
@@ -0,0 +1,186 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+# --- Persistent leaderboard for the memory game ---
+# Finished games go into one SQLite file in WAL mode, so any number of
+# sessions and server processes can read while one of them writes. record()
+# only queues the game; a writer thread inserts whatever has queued up in one
+# transaction, so many finishing players cost one commit rather than one each.
+# Top-N lists come from the (difficulty, moves, seconds) index and are cached
+# in memory: a new record that would enter a cached list drops it, and cached
+# lists also expire after `cache_ttl` to pick up other processes' writes.
+# Per-difficulty game counts and best scores are kept in a small totals table
+# in the same transactions, so stats never scan the games table; they are
+# cached like the lists and dropped on every commit. Readers open a connection
+# per query and close it at once. A batch that cannot be written (still
+# locked after `max_retries` tries, bad data, a read-only file) is logged and
+# dropped, so the writer and flush() carry on.
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS games ("
+    "id INTEGER PRIMARY KEY, difficulty TEXT NOT NULL, moves INTEGER NOT NULL, "
+    "seconds REAL NOT NULL, player TEXT NOT NULL, finished REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS games_rank ON games (difficulty, moves, seconds)",
+    "DROP INDEX IF EXISTS games_recent",  # Made by earlier versions; no query uses it
+    "CREATE TABLE IF NOT EXISTS totals ("
+    "difficulty TEXT PRIMARY KEY, games INTEGER NOT NULL, best_moves INTEGER NOT NULL, "
+    "best_seconds REAL NOT NULL)",
+)
+
+
+class Leaderboard:
+    """
+    Scores of finished games, shared by every session on the machine.
+    Args:
+        path (str): SQLite file.
+        batch_size (int): Most games inserted per transaction.
+        cache_ttl (float): Seconds a cached top-N list is trusted.
+        max_retries (int): Tries for a batch that hits an OperationalError (still locked after
+            the 30 s connection timeout, a disk I/O error) before it is dropped.
+    """
+
+    def __init__(self, path, batch_size=500, cache_ttl=5.0, max_retries=5):
+        self.path = path
+        self.batch_size = batch_size
+        self.cache_ttl = cache_ttl
+        self.max_retries = max_retries
+        self.commits = 0
+        self.dropped = 0
+        self._pending = queue.Queue()
+        self._cache = {}  # (difficulty, limit) -> (expires, rows)
+        self._totals = None  # (expires, totals)
+        self._cache_lock = threading.Lock()
+        self._generation = 0  # Bumped on every invalidation, so a read racing a commit is not cached
+        with closing(self._connect()) as conn, conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+        self._writer = threading.Thread(target=self._write_loop, name="leaderboard-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints; WAL keeps the file consistent
+        return conn
+
+    def record(self, difficulty, moves, seconds, player="Anonymous"):
+        """Queues a finished game. Returns at once; the writer thread stores it."""
+        self._pending.put((difficulty, int(moves), float(seconds), player or "Anonymous", time.time()))
+
+    def flush(self, timeout=60.0):
+        """
+        Blocks until every game recorded so far is committed or dropped.
+        Returns:
+            bool: False if `timeout` seconds passed first.
+        """
+        done = threading.Event()
+        self._pending.put(done)
+        return done.wait(timeout)
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batch = [self._pending.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            games = [item for item in batch if isinstance(item, tuple)]
+            try:
+                if games:
+                    self._write_batch(conn, games)
+            except Exception:
+                self.dropped += len(games)
+                logger.exception("Dropped %d leaderboard games", len(games))
+            finally:
+                for item in batch:
+                    if isinstance(item, threading.Event):
+                        item.set()
+
+    def _write_batch(self, conn, games):
+        for attempt in range(self.max_retries):
+            try:
+                self._insert(conn, games)
+                return
+            except sqlite3.OperationalError:  # Locked by other writers, or the file is unusable
+                if attempt == self.max_retries - 1:
+                    raise
+                time.sleep(0.1)
+
+    def _insert(self, conn, games):
+        best = {}
+        for difficulty, moves, seconds, _, _ in games:
+            count, best_moves, best_seconds = best.get(difficulty, (0, moves, seconds))
+            best[difficulty] = (count + 1, *min((best_moves, best_seconds), (moves, seconds)))
+        with conn:
+            conn.executemany(
+                "INSERT INTO games (difficulty, moves, seconds, player, finished) VALUES (?, ?, ?, ?, ?)", games
+            )
+            conn.executemany(
+                "INSERT INTO totals VALUES (?, ?, ?, ?) ON CONFLICT (difficulty) DO UPDATE SET "
+                "games = games + excluded.games, "
+                "best_seconds = CASE WHEN (excluded.best_moves, excluded.best_seconds) < (best_moves, best_seconds) "
+                "THEN excluded.best_seconds ELSE best_seconds END, "
+                "best_moves = MIN(best_moves, excluded.best_moves)",
+                [(difficulty, *values) for difficulty, values in best.items()],
+            )
+        self.commits += 1
+        for game in games:
+            self._invalidate(game)
+
+    def _invalidate(self, game):
+        """Drops cached lists the new game would enter, and the cached totals."""
+        difficulty, moves, seconds = game[:3]
+        with self._cache_lock:
+            self._generation += 1
+            self._totals = None
+            for (cached_difficulty, limit), (_, rows) in list(self._cache.items()):
+                if cached_difficulty == difficulty and (len(rows) < limit or (moves, seconds) < rows[-1][1:3]):
+                    del self._cache[(cached_difficulty, limit)]
+
+    def top(self, difficulty, limit=10):
+        """
+        The best games for a difficulty, fewest moves first and then fastest.
+        Returns:
+            list: (player, moves, seconds, finished) tuples.
+        """
+        key = (difficulty, limit)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            generation = self._generation
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT player, moves, seconds, finished FROM games WHERE difficulty = ? "
+                "ORDER BY moves, seconds LIMIT ?",
+                (difficulty, limit),
+            ).fetchall()
+        with self._cache_lock:
+            if generation == self._generation:
+                self._cache[key] = (time.monotonic() + self.cache_ttl, rows)
+        return rows
+
+    def totals(self):
+        """
+        Returns:
+            dict: difficulty -> (games played, best moves, best seconds)
+        """
+        with self._cache_lock:
+            cached = self._totals
+            generation = self._generation
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        with closing(self._connect()) as conn:
+            totals = {row[0]: row[1:] for row in conn.execute("SELECT * FROM totals")}
+        with self._cache_lock:
+            if generation == self._generation:
+                self._totals = (time.monotonic() + self.cache_ttl, totals)
+        return totals
@@ -1,230 +1,112 @@
+import hashlib
+import os
 import streamlit as st
-import random
 import time
 
+from leaderboard import Leaderboard
+from memory_engine import COMPLETE, DIFFICULTIES, MAX_CARDS, MemoryGame, flip_back_style
+
+DIFFICULTY_LABELS = {
+    'easy': "🟢 Easy",
+    'medium': "🟡 Medium",
+    'hard': "🔴 Hard",
+    'expert': "🟣 Expert",
+    'giant': "⚫ Giant",
+}
+THEME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "memo3.css")
+
+@st.cache_resource
+def theme_tag():
+    """
+    The tag that loads static/memo3.css, built once per process. With static file
+    serving on (.streamlit/config.toml) each rerun sends a short <link> whose URL
+    changes with the file's contents, so browsers cache the stylesheet; without
+    it the CSS is inlined.
+    """
+    with open(THEME_PATH, "rb") as f:
+        css = f.read()
+    if st.get_option("server.enableStaticServing"):
+        version = hashlib.sha256(css).hexdigest()[:12]
+        return f'<link rel="stylesheet" href="app/static/memo3.css?v={version}">'
+    return f"<style>{css.decode()}</style>"
+
 # Custom CSS for better styling
-st.markdown("""
-<style>
-    /* Hide default streamlit styling */
-    .stButton > button {
-        width: 100%;
-        height: 80px;
-        font-size: 2rem;
-        border-radius: 15px;
-        border: 3px solid #e1e5e9;
-        background: linear-gradient(145deg, #f0f2f6, #ffffff);
-        box-shadow: 5px 5px 10px #d1d9e6, -5px -5px 10px #ffffff;
-        transition: all 0.3s ease;
-        margin: 2px;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 7px 7px 15px #d1d9e6, -7px -7px 15px #ffffff;
-        border-color: #4CAF50;
-    }
-    
-    .stButton > button:active {
-        transform: translateY(0px);
-        box-shadow: 3px 3px 8px #d1d9e6, -3px -3px 8px #ffffff;
-    }
-    
-    /* Matched cards styling */
-    .matched-card {
-        background: linear-gradient(145deg, #c8e6c9, #a5d6a7) !important;
-        border-color: #4CAF50 !important;
-        animation: pulse 0.5s ease-in-out;
-    }
-    
-    /* Card back styling */
-    .card-back {
-        background: linear-gradient(145deg, #90caf9, #64b5f6) !important;
-        border-color: #2196F3 !important;
-    }
-    
-    /* Revealed card styling */
-    .revealed-card {
-        background: linear-gradient(145deg, #fff3e0, #ffe0b2) !important;
-        border-color: #FF9800 !important;
-        animation: flip 0.6s ease-in-out;
-    }
-    
-    @keyframes pulse {
-        0% { transform: scale(1); }
-        50% { transform: scale(1.05); }
-        100% { transform: scale(1); }
-    }
-    
-    @keyframes flip {
-        0% { transform: rotateY(0deg); }
-        50% { transform: rotateY(90deg); }
-        100% { transform: rotateY(0deg); }
-    }
-    
-    /* Game title styling */
-    .game-title {
-        text-align: center;
-        font-size: 3rem;
-        background: linear-gradient(45deg, #FF6B6B, #4ECDC4, #45B7D1, #96CEB4, #FECA57);
-        background-size: 300% 300%;
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        animation: gradient 3s ease infinite;
-        margin-bottom: 20px;
-    }
-    
-    @keyframes gradient {
-        0% { background-position: 0% 50%; }
-        50% { background-position: 100% 50%; }
-        100% { background-position: 0% 50%; }
-    }
-    
-    /* Metrics styling */
-    .metric-container {
-        background: linear-gradient(145deg, #f8f9fa, #e9ecef);
-        padding: 15px;
-        border-radius: 15px;
-        text-align: center;
-        box-shadow: 5px 5px 10px #d1d9e6, -5px -5px 10px #ffffff;
-        margin: 5px;
-    }
-    
-    /* Game board container */
-    .game-board {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 20px;
-        border-radius: 20px;
-        box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-        margin: 20px 0;
-    }
-    
-    /* Difficulty buttons */
-    .difficulty-btn {
-        background: linear-gradient(45deg, #667eea, #764ba2);
-        color: white;
-        border: none;
-        padding: 10px 20px;
-        border-radius: 25px;
-        margin: 5px;
-        cursor: pointer;
-        transition: all 0.3s ease;
-    }
-    
-    .difficulty-btn:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 5px 15px rgba(0,0,0,0.2);
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(theme_tag(), unsafe_allow_html=True)
+
+LEADERBOARD_DB = os.environ.get("MEMO3_LEADERBOARD_DB") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "memo3_leaderboard.db")
+MEDALS = ("🥇", "🥈", "🥉")
+
+@st.cache_resource
+def get_leaderboard():
+    """One leaderboard (and writer thread) per server process, shared by every session."""
+    return Leaderboard(LEADERBOARD_DB)
 
 # Initialize the game state
 def init_game(difficulty='medium'):
-    if difficulty == 'easy':
-        emojis = ["🐶", "🐱", "🐭", "🐹"]
-        grid_size = (2, 4)
-    elif difficulty == 'medium':
-        emojis = ["🐶", "🐱", "🐭", "🐹", "🐰", "🦊", "🐻", "🐼"]
-        grid_size = (4, 4)
-    else:  # hard
-        emojis = ["🐶", "🐱", "🐭", "🐹", "🐰", "🦊", "🐻", "🐼", "🐸", "🦁", "🐯", "🐨"]
-        grid_size = (4, 6)
-    
-    cards = emojis + emojis  # Create pairs
-    random.shuffle(cards)
-    total_cards = len(cards)
-    
-    return {
-        'cards': cards,
-        'revealed': [False] * total_cards,
-        'matched': [False] * total_cards,
-        'first_card': None,
-        'second_card': None,
-        'moves': 0,
-        'matches': 0,
-        'game_complete': False,
-        'show_second_card': False,
-        'last_move_time': 0,
-        'difficulty': difficulty,
-        'grid_size': grid_size,
-        'total_pairs': len(emojis),
-        'start_time': time.time(),
-        'best_score': None
-    }
+    """`difficulty` is a DIFFICULTIES name or a custom "<rows>x<cols>" board."""
+    if difficulty in DIFFICULTIES:
+        rows, cols = DIFFICULTIES[difficulty]
+    else:
+        rows, cols = map(int, difficulty.split("x"))
+    return MemoryGame(rows, cols, difficulty)
 
 # Initialize session state
 if 'game_state' not in st.session_state:
     st.session_state.game_state = init_game()
 
 if 'best_scores' not in st.session_state:
-    st.session_state.best_scores = {'easy': None, 'medium': None, 'hard': None}
+    st.session_state.best_scores = {}  # Difficulty -> fewest moves this session
+    st.session_state.games_played = 0
 
 def reset_game(difficulty=None):
     if difficulty is None:
-        difficulty = st.session_state.game_state['difficulty']
+        difficulty = st.session_state.game_state.difficulty
     st.session_state.game_state = init_game(difficulty)
 
 def handle_card_click(index):
     game = st.session_state.game_state
-    
-    if game['matched'][index] or game['revealed'][index]:
-        return
-    
-    if game['show_second_card'] and time.time() - game['last_move_time'] < 1.5:
-        return
-    
-    if game['first_card'] is None:
-        game['first_card'] = index
-        game['revealed'][index] = True
-    
-    elif game['second_card'] is None and index != game['first_card']:
-        game['second_card'] = index
-        game['revealed'][index] = True
-        game['moves'] += 1
-        game['show_second_card'] = True
-        game['last_move_time'] = time.time()
-        
-        if game['cards'][game['first_card']] == game['cards'][game['second_card']]:
-            game['matched'][game['first_card']] = True
-            game['matched'][game['second_card']] = True
-            game['matches'] += 1
-            
-            game['first_card'] = None
-            game['second_card'] = None
-            game['show_second_card'] = False
-            
-            if game['matches'] == game['total_pairs']:
-                game['game_complete'] = True
-                # Update best score
-                current_score = game['moves']
-                difficulty = game['difficulty']
-                if (st.session_state.best_scores[difficulty] is None or 
-                    current_score < st.session_state.best_scores[difficulty]):
-                    st.session_state.best_scores[difficulty] = current_score
-
-def check_and_hide_cards():
+    # The clicked card, the card it is paired with and a showing mismatch are all that can change
+    changed = {index, game.first_card, game.second_card} - {None}
+    if game.click(index) == COMPLETE:
+        # Update best score
+        best = st.session_state.best_scores.get(game.difficulty)
+        if best is None or game.moves < best:
+            st.session_state.best_scores[game.difficulty] = game.moves
+        st.session_state.games_played += 1
+        get_leaderboard().record(game.difficulty, game.moves, time.time() - game.start_time,
+                                 st.session_state.get('player_name'))
+        st.rerun()  # Redraw the whole page so the stats show the new score
+    st.rerun([f"cell_{i}" for i in changed])
+
+def card_cell(index):
+    """One card, drawn as its own fragment so a click redraws only the cards it changed."""
     game = st.session_state.game_state
-    
-    if (game['show_second_card'] and 
-        game['first_card'] is not None and 
-        game['second_card'] is not None and
-        time.time() - game['last_move_time'] > 1.5):
-        
-        if not game['matched'][game['first_card']]:
-            game['revealed'][game['first_card']] = False
-            game['revealed'][game['second_card']] = False
-        
-        game['first_card'] = None
-        game['second_card'] = None
-        game['show_second_card'] = False
+    card_emoji = game.face(index) if game.is_face_up(index) else "❓"
+    
+    # Add special styling for different card states
+    button_class = get_card_class(index)
+    
+    st.button(
+        card_emoji, 
+        key=f"card_{index}",
+        disabled=game.is_matched(index),
+        help=f"Card {index + 1}",
+        on_click=handle_card_click,
+        args=(index,),
+    )
+    style = flip_back_style(game, cards=(index,))
+    if style:
+        st.markdown(style, unsafe_allow_html=True)
 
 def get_time_elapsed():
-    return int(time.time() - st.session_state.game_state['start_time'])
+    return int(time.time() - st.session_state.game_state.start_time)
 
 def get_card_class(index):
     game = st.session_state.game_state
-    if game['matched'][index]:
+    if game.is_matched(index):
         return "matched-card"
-    elif game['revealed'][index]:
+    elif game.is_face_up(index):
         return "revealed-card"
     else:
         return "card-back"
@@ -234,70 +116,64 @@ st.markdown('<h1 class="game-title">🧠 Memory Card Game</h1>', unsafe_allow_ht
 
 # Difficulty selection
 st.subheader("🎯 Select Difficulty")
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    if st.button("🟢 Easy (2x4)", key="easy_btn"):
-        reset_game('easy')
-        st.rerun()
-
-with col2:
-    if st.button("🟡 Medium (4x4)", key="medium_btn"):
-        reset_game('medium')
-        st.rerun()
-
-with col3:
-    if st.button("🔴 Hard (4x6)", key="hard_btn"):
-        reset_game('hard')
-        st.rerun()
+cols = st.columns(len(DIFFICULTIES))
+
+for col, (difficulty, (rows, cols_per_row)) in zip(cols, DIFFICULTIES.items()):
+    with col:
+        if st.button(f"{DIFFICULTY_LABELS[difficulty]} ({rows}x{cols_per_row})", key=f"{difficulty}_btn"):
+            reset_game(difficulty)
+            st.rerun()
+
+with st.expander("📐 Custom Board"):
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        custom_rows = st.number_input("Rows", min_value=2, max_value=20, value=10, key="custom_rows")
+    with col2:
+        custom_cols = st.number_input("Columns", min_value=2, max_value=20, value=10, key="custom_cols")
+    with col3:
+        if st.button("🃏 Deal", key="custom_btn"):
+            if custom_rows * custom_cols % 2 or custom_rows * custom_cols > MAX_CARDS:
+                st.error(f"Pick an even number of cards, at most {MAX_CARDS}.")
+            else:
+                reset_game(f"{custom_rows}x{custom_cols}")
+                st.rerun()
 
 # Game stats
 game = st.session_state.game_state
 st.markdown("---")
 
-
-
 # New game button
 if st.button("🔄 New Game", key="new_game"):
     reset_game()
     st.rerun()
 
 # Check if we need to hide cards
-check_and_hide_cards()
+game.hide_mismatch()
 
 # Display the game board with enhanced styling
 st.markdown('<div class="game-board">', unsafe_allow_html=True)
 
-rows, cols_per_row = game['grid_size']
-for row in range(rows):
-    cols = st.columns(cols_per_row)
-    for col in range(cols_per_row):
-        index = row * cols_per_row + col
-        
-        if index < len(game['cards']):
-            with cols[col]:
-                card_emoji = game['cards'][index] if (game['matched'][index] or game['revealed'][index]) else "❓"
-                
-                # Add special styling for different card states
-                button_class = get_card_class(index)
-                
-                if st.button(
-                    card_emoji, 
-                    key=f"card_{index}",
-                    disabled=game['matched'][index],
-                    help=f"Card {index + 1}"
-                ):
-                    handle_card_click(index)
+if game.cols > 6:  # Shrink the cards so wide boards still fit
+    scale = 6 / game.cols
+    st.markdown(f'<style>[class*="st-key-card_"] button {{height: {80 * scale:.0f}px; '
+                f'font-size: {2 * scale:.2f}rem; padding: 0}}</style>', unsafe_allow_html=True)
+
+for row in range(game.rows):
+    cols = st.columns(game.cols)
+    for col in range(game.cols):
+        index = row * game.cols + col
+        with cols[col]:
+            st.fragment(card_cell, key=f"cell_{index}")(index)
 
 st.markdown('</div>', unsafe_allow_html=True)
 
 # Game completion with enhanced celebration
-if game['game_complete']:
+if game.complete:
     st.balloons()
     
     # Calculate performance
     time_taken = get_time_elapsed()
-    performance = "🌟 Perfect!" if game['moves'] == game['total_pairs'] else "🎯 Great job!"
+    performance = "🌟 Perfect!" if game.moves == game.total_pairs else "🎯 Great job!"
     
     st.markdown(f"""
     <div style="text-align: center; padding: 20px; background: linear-gradient(45deg, #FFD700, #FFA500); 
@@ -305,8 +181,8 @@ if game['game_complete']:
         <h1>🎉 Congratulations!</h1>
         <h2>{performance}</h2>
         <p><strong>Time:</strong> {time_taken} seconds</p>
-        <p><strong>Moves:</strong> {game['moves']}</p>
-        <p><strong>Efficiency:</strong> {round((game['total_pairs'] / game['moves']) * 100)}%</p>
+        <p><strong>Moves:</strong> {game.moves}</p>
+        <p><strong>Efficiency:</strong> {round((game.total_pairs / game.moves) * 100)}%</p>
     </div>
     """, unsafe_allow_html=True)
     
@@ -314,11 +190,6 @@ if game['game_complete']:
         reset_game()
         st.rerun()
 
-# Auto-refresh for card animations
-if game['show_second_card']:
-    time.sleep(0.1)
-    st.rerun()
-
 # Enhanced instructions
 with st.expander("ℹ️ How to Play & Tips"):
     st.markdown("""
@@ -338,15 +209,26 @@ with st.expander("ℹ️ How to Play & Tips"):
     - 🟢 **Easy**: 2×4 grid (4 pairs) - Perfect for beginners
     - 🟡 **Medium**: 4×4 grid (8 pairs) - Balanced challenge  
     - 🔴 **Hard**: 4×6 grid (12 pairs) - Memory master level
+    - 🟣 **Expert**: 6×8 grid (24 pairs) - For the truly dedicated
+    - ⚫ **Giant**: 10×10 grid (50 pairs) - Bring snacks
+    - 📐 **Custom**: any board up to 20×20
     """)
 
 # Add some fun stats
 with st.expander("📊 Session Stats"):
-    total_games = sum(1 for score in st.session_state.best_scores.values() if score is not None)
-    if total_games > 0:
-        st.write(f"🎮 **Games Played:** {total_games}")
+    if st.session_state.games_played > 0:
+        st.write(f"🎮 **Games Played:** {st.session_state.games_played}")
         for difficulty, score in st.session_state.best_scores.items():
-            if score is not None:
-                st.write(f"🏆 **Best {difficulty.title()}:** {score} moves")
+            st.write(f"🏆 **Best {difficulty.title()}:** {score} moves")
     else:
-        st.write("🎯 Complete your first game to see stats!")
\ No newline at end of file
+        st.write("🎯 Complete your first game to see stats!")
+
+# All-time scores from every player
+with st.expander(f"🏆 Leaderboard: {game.difficulty.title()}"):
+    st.text_input("Your name", key="player_name", max_chars=24, placeholder="Anonymous")
+    leaderboard = get_leaderboard()
+    played = leaderboard.totals().get(game.difficulty, (0,))[0]
+    st.write(f"🎮 **Games recorded:** {played}")
+    for rank, (player, moves, seconds, _) in enumerate(leaderboard.top(game.difficulty)):
+        medal = MEDALS[rank] if rank < len(MEDALS) else f"{rank + 1}."
+        st.write(f"{medal} **{player}** - {moves} moves in {seconds:.0f} seconds")
\ No newline at end of file
@@ -0,0 +1,199 @@
+import random
+import struct
+import time
+
+# --- Memory card game rules, shared by memory2.py and memo3.py ---
+# A game is one small object: the cards are symbol ids in a bytearray, and
+# the face-up and matched cards are bitmasks, so a click is a few integer
+# operations and a pickled game is a few dozen bytes. Card i is bit 1 << i.
+# A mismatched pair stays face up for FLIP_BACK_S; clicks are ignored until
+# then and the pair is turned over by the next click (or hide_mismatch).
+#
+# Time comes from an injectable clock, so games can be played and replayed
+# headless. A game can also keep an append-only move log: a header (magic,
+# rows, cols, start time, the dealt cards) followed by 6 bytes per click (card,
+# milliseconds since the start). replay() rebuilds the game from the log.
+
+# The classic twelve first, then more emoji for big boards: animals, plants,
+# food and party things (ranges of single code points that render as emoji)
+_EMOJI_RANGES = ((0x1F400, 0x1F43E), (0x1F980, 0x1F997), (0x1F330, 0x1F335), (0x1F337, 0x1F37C),
+                 (0x1F950, 0x1F96B), (0x1F380, 0x1F393))
+SYMBOLS = tuple(dict.fromkeys(
+    ["🐶", "🐱", "🐭", "🐹", "🐰", "🦊", "🐻", "🐼", "🐸", "🦁", "🐯", "🐨"]
+    + [chr(code) for first, last in _EMOJI_RANGES for code in range(first, last + 1)]
+))
+DIFFICULTIES = {  # name: (rows, cols)
+    'easy': (2, 4),
+    'medium': (4, 4),
+    'hard': (4, 6),
+    'expert': (6, 8),
+    'giant': (10, 10),
+}
+MAX_CARDS = 2 * min(len(SYMBOLS), 256)  # Card ids are bytes
+FLIP_BACK_S = 1.5  # How long a mismatched pair stays face up
+
+# What a click did
+IGNORED, FIRST, MISMATCH, MATCH, COMPLETE = range(5)
+
+LOG_MAGIC = b"MEM1"
+_LOG_HEADER = struct.Struct("<4sBBd")  # Magic, rows, cols, start time; the cards follow
+_LOG_CLICK = struct.Struct("<HI")  # Card, milliseconds since the start
+
+
+class MemoryGame:
+    """
+    One game of memory.
+    Args:
+        rows (int): Board height.
+        cols (int): Board width; rows * cols must be even.
+        difficulty (str): Label kept for scores, e.g. 'medium'.
+        rng (random.Random): Shuffles the cards. None leaves them in order, e.g. to set them from a log.
+        clock (callable): Returns the time in seconds. Defaults to time.time.
+        log (bool): Keep a move log in `log`.
+    """
+
+    __slots__ = ("cards", "rows", "cols", "difficulty", "face_up", "matched", "first_card", "second_card",
+                 "moves", "matches", "last_move_time", "start_time", "clock", "log")
+
+    def __init__(self, rows, cols, difficulty=None, rng=random, clock=None, log=False):
+        size = rows * cols
+        if size % 2 or not 0 < size <= MAX_CARDS:
+            raise ValueError(f"Cannot deal a {rows}x{cols} board")
+        cards = list(range(size // 2)) * 2  # Create pairs
+        if rng is not None:
+            rng.shuffle(cards)
+        self.cards = bytearray(cards)
+        self.rows, self.cols = rows, cols
+        self.difficulty = difficulty
+        self.face_up = 0   # Bitmask of cards showing their symbol, matched or not
+        self.matched = 0   # Bitmask of matched cards
+        self.first_card = None
+        self.second_card = None  # Set only while a mismatched pair is showing
+        self.moves = 0
+        self.matches = 0
+        self.last_move_time = 0.0
+        self.clock = clock
+        self.start_time = self.now()
+        self.log = bytearray(_LOG_HEADER.pack(LOG_MAGIC, rows, cols, self.start_time) + self.cards) if log else None
+
+    def __getstate__(self):
+        # A bare tuple pickles smaller than the default dict of slot names
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    @property
+    def size(self):
+        return len(self.cards)
+
+    @property
+    def total_pairs(self):
+        return len(self.cards) // 2
+
+    @property
+    def complete(self):
+        return self.matches == self.total_pairs
+
+    def now(self):
+        return (self.clock or time.time)()
+
+    def face(self, index):
+        return SYMBOLS[self.cards[index]]
+
+    def is_face_up(self, index):
+        return self.face_up >> index & 1 == 1
+
+    def is_matched(self, index):
+        return self.matched >> index & 1 == 1
+
+    def hide_mismatch(self, now=None):
+        """Turns a mismatched pair face down once FLIP_BACK_S is up. Returns True if it did."""
+        if self.second_card is None:
+            return False
+        if (self.now() if now is None else now) - self.last_move_time < FLIP_BACK_S:
+            return False
+        self.face_up &= ~(1 << self.first_card | 1 << self.second_card)
+        self.first_card = self.second_card = None
+        return True
+
+    def click(self, index, now=None):
+        """
+        Turns over card `index`.
+        Returns:
+            int: IGNORED, FIRST, MISMATCH, MATCH or COMPLETE.
+        """
+        now = self.now() if now is None else now
+        if self.log is not None:
+            # Play on the logged millisecond, so a replay makes exactly the same decisions
+            elapsed_ms = max(0, round((now - self.start_time) * 1000))
+            self.log += _LOG_CLICK.pack(index, elapsed_ms)
+            now = self.start_time + elapsed_ms / 1000
+        self.hide_mismatch(now)
+        bit = 1 << index
+        # Ignore face-up cards, and any click while a mismatched pair is showing
+        if self.face_up & bit or self.second_card is not None:
+            return IGNORED
+        self.face_up |= bit
+        if self.first_card is None:
+            self.first_card = index
+            return FIRST
+
+        self.moves += 1
+        self.last_move_time = now
+        first = self.first_card
+        if self.cards[first] != self.cards[index]:
+            self.second_card = index
+            return MISMATCH
+        self.matched |= bit | 1 << first
+        self.matches += 1
+        self.first_card = None
+        return COMPLETE if self.complete else MATCH
+
+
+def replay(data, log=False):
+    """
+    Rebuilds a game from its move log.
+    Args:
+        data (bytes): A MemoryGame.log.
+        log (bool): Keep a log in the rebuilt game too.
+    Returns:
+        MemoryGame: The game after every logged click.
+    """
+    magic, rows, cols, start_time = _LOG_HEADER.unpack_from(data)
+    if magic != LOG_MAGIC:
+        raise ValueError("Not a memory game log")
+    cards_end = _LOG_HEADER.size + rows * cols
+    # No shuffle: the dealt cards come from the log, and the global random state is left alone
+    game = MemoryGame(rows, cols, rng=None, clock=lambda: start_time, log=log)
+    game.cards[:] = data[_LOG_HEADER.size:cards_end]
+    if log:
+        game.log[:] = data[:cards_end]
+    game.clock = None
+    for index, elapsed_ms in _LOG_CLICK.iter_unpack(memoryview(data)[cards_end:]):
+        game.click(index, start_time + elapsed_ms / 1000)
+    return game
+
+
+def flip_back_style(game, key_prefix="card_", cards=None):
+    """
+    CSS that turns a showing mismatched pair face down in the browser when
+    FLIP_BACK_S is up, so the page needs no rerun to hide it. Cards are the
+    buttons keyed f"{key_prefix}{index}"; `cards` limits the rules to some of the pair.
+    """
+    if game.second_card is None:
+        return ""
+    pair = (game.first_card, game.second_card)
+    cards = pair if cards is None else [index for index in cards if index in pair]
+    if not cards:
+        return ""
+    delay = max(0.0, FLIP_BACK_S - (game.now() - game.last_move_time))
+    rules = "".join(
+        f".st-key-{key_prefix}{index} button p {{animation: flip-back-face 0s {delay:.2f}s forwards}} "
+        f'.st-key-{key_prefix}{index} button::after {{content: "❓"; position: absolute; opacity: 0; '
+        f"animation: flip-back-cover 0s {delay:.2f}s forwards}} "
+        for index in cards
+    )
+    return (f"<style>{rules}@keyframes flip-back-face {{to {{opacity: 0}}}} "
+            f"@keyframes flip-back-cover {{to {{opacity: 1}}}}</style>")
@@ -0,0 +1,303 @@
+import random
+import time
+from functools import lru_cache
+
+# --- m,n,k games: tic-tac-toe on any board with any win length ---
+# A board has `rows` x `cols` squares and `k` marks in a row (across, down or
+# diagonally) win: 3,3,3 is tic-tac-toe, 4,4,4 and 7,7,5 (gomoku-style) are
+# the larger presets. Squares are numbered row-major; each player's marks are
+# one integer bitboard, as in ttt_engine.
+#
+# The AI is a negamax search with alpha-beta pruning and iterative deepening
+# under a time budget: it searches depth 1, 2, 3, ... and answers with the
+# best move of the deepest search that finished. Positions are evaluated
+# incrementally from line threats: every length-k window still open to only
+# one player is worth LINE_WEIGHTS[marks in it] to that player, and a move
+# only changes the windows through its square. Moves are ordered by the
+# threats they make or block, with the transposition table's best move
+# first. The table is keyed by Zobrist hashes.
+
+LINE_WEIGHTS = (0, 1, 8, 64, 512, 4096, 32768, 262144)
+WIN_SCORE = 10 ** 9
+NEIGHBOUR_DISTANCE = 2  # Only squares this close to a mark are worth searching
+TIME_CHECK_NODES = 64
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class Geometry:
+    """
+    Squares, winning lines and Zobrist keys of an m,n,k board, computed once per shape.
+    Args:
+        rows (int): Board height.
+        cols (int): Board width.
+        k (int): Marks in a row needed to win.
+    """
+
+    __slots__ = ("rows", "cols", "k", "size", "full", "lines", "lines_through", "neighbours", "zobrist")
+
+    def __init__(self, rows, cols, k):
+        if not 2 < k <= max(rows, cols) or k >= len(LINE_WEIGHTS):
+            raise ValueError(f"Unsupported win length {k} for a {rows}x{cols} board")
+        self.rows, self.cols, self.k = rows, cols, k
+        self.size = rows * cols
+        self.full = (1 << self.size) - 1
+
+        self.lines = []
+        for r in range(rows):
+            for c in range(cols):
+                for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                    if 0 <= end_r < rows and 0 <= end_c < cols:
+                        mask = 0
+                        for step in range(k):
+                            mask |= 1 << ((r + dr * step) * cols + c + dc * step)
+                        self.lines.append(mask)
+        self.lines_through = [
+            [i for i, mask in enumerate(self.lines) if mask >> square & 1] for square in range(self.size)
+        ]
+
+        self.neighbours = []
+        for square in range(self.size):
+            r, c = divmod(square, cols)
+            mask = 0
+            for nr in range(max(0, r - NEIGHBOUR_DISTANCE), min(rows, r + NEIGHBOUR_DISTANCE + 1)):
+                for nc in range(max(0, c - NEIGHBOUR_DISTANCE), min(cols, c + NEIGHBOUR_DISTANCE + 1)):
+                    mask |= 1 << (nr * cols + nc)
+            self.neighbours.append(mask)
+
+        rng = random.Random(rows * 10_000 + cols * 100 + k)  # Same keys in every process
+        self.zobrist = [[rng.getrandbits(64) for _ in range(self.size)] for _ in range(2)]
+
+    def is_win(self, bits):
+        """True if bits contain k in a row anywhere."""
+        for mask in self.lines:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def wins_through(self, bits, square):
+        """True if bits contain k in a row through `square` (the only place a new mark can win)."""
+        for i in self.lines_through[square]:
+            mask = self.lines[i]
+            if bits & mask == mask:
+                return True
+        return False
+
+
+@lru_cache(maxsize=None)
+def get_geometry(rows, cols, k):
+    return Geometry(rows, cols, k)
+
+
+def _line_value(own, other):
+    """Value of one window to player 0, given both players' marks in it."""
+    if other == 0:
+        return LINE_WEIGHTS[own]
+    if own == 0:
+        return -LINE_WEIGHTS[other]
+    return 0  # Blocked for both
+
+
+class _Timeout(Exception):
+    pass
+
+
+class Search:
+    """
+    One AI decision: the position, its incremental evaluation and the transposition table.
+    Args:
+        geometry (Geometry): Board shape.
+        bits (tuple): (player 0 bits, player 1 bits). Player 0 moves first.
+    """
+
+    __slots__ = ("geometry", "bits", "counts", "score", "hash", "table", "nodes", "deadline", "depth_reached")
+
+    def __init__(self, geometry, bits):
+        self.geometry = geometry
+        self.bits = list(bits)
+        # counts[player][line]: that player's marks in each window
+        self.counts = [[0] * len(geometry.lines) for _ in range(2)]
+        self.score = 0  # Sum of _line_value over all windows, for player 0
+        self.hash = 0
+        self.table = {}
+        self.nodes = 0
+        self.deadline = None
+        self.depth_reached = 0
+        for player in range(2):
+            board = bits[player]
+            while board:
+                bit = board & -board
+                board ^= bit
+                self._mark(player, bit.bit_length() - 1)
+        for i in range(len(geometry.lines)):
+            self.score += _line_value(self.counts[0][i], self.counts[1][i])
+
+    def _mark(self, player, square):
+        """Records a mark in the counts and hash only (the score is built separately)."""
+        for i in self.geometry.lines_through[square]:
+            self.counts[player][i] += 1
+        self.hash ^= self.geometry.zobrist[player][square]
+
+    def play(self, player, square):
+        """Places a mark, updating the evaluation from the windows through the square. Returns True on a win."""
+        own, other = self.counts[player], self.counts[1 - player]
+        won = False
+        delta = 0
+        for i in self.geometry.lines_through[square]:
+            mine, theirs = own[i], other[i]
+            before = _line_value(mine, theirs) if player == 0 else _line_value(theirs, mine)
+            own[i] = mine + 1
+            after = _line_value(mine + 1, theirs) if player == 0 else _line_value(theirs, mine + 1)
+            delta += after - before
+            if mine + 1 == self.geometry.k:
+                won = True
+        self.score += delta
+        self.bits[player] |= 1 << square
+        self.hash ^= self.geometry.zobrist[player][square]
+        return won
+
+    def undo(self, player, square):
+        own, other = self.counts[player], self.counts[1 - player]
+        delta = 0
+        for i in self.geometry.lines_through[square]:
+            mine, theirs = own[i], other[i]
+            before = _line_value(mine, theirs) if player == 0 else _line_value(theirs, mine)
+            own[i] = mine - 1
+            after = _line_value(mine - 1, theirs) if player == 0 else _line_value(theirs, mine - 1)
+            delta += after - before
+        self.score += delta
+        self.bits[player] &= ~(1 << square)
+        self.hash ^= self.geometry.zobrist[player][square]
+
+    def candidates(self):
+        """Empty squares near existing marks (the center on an empty board, every empty square if none is near)."""
+        geometry = self.geometry
+        occupied = self.bits[0] | self.bits[1]
+        if not occupied:
+            return [(geometry.rows // 2) * geometry.cols + geometry.cols // 2]
+        near = 0
+        board = occupied
+        while board:
+            bit = board & -board
+            board ^= bit
+            near |= geometry.neighbours[bit.bit_length() - 1]
+        near &= ~occupied
+        if not near:
+            near = geometry.full & ~occupied
+        squares = []
+        while near:
+            bit = near & -near
+            near ^= bit
+            squares.append(bit.bit_length() - 1)
+        return squares
+
+    def _ordered(self, player, best_move):
+        """Candidates sorted by the threats they make plus the threats they block."""
+        own, other = self.counts[player], self.counts[1 - player]
+        lines_through = self.geometry.lines_through
+
+        def threat(square):
+            value = 0
+            for i in lines_through[square]:
+                if other[i] == 0:
+                    value += LINE_WEIGHTS[own[i] + 1]
+                elif own[i] == 0:
+                    value += LINE_WEIGHTS[other[i] + 1]
+            return value
+
+        moves = sorted(self.candidates(), key=threat, reverse=True)
+        if best_move in moves:
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+        return moves
+
+    def negamax(self, player, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % TIME_CHECK_NODES == 0 and time.perf_counter() > self.deadline:
+            raise _Timeout
+
+        entry = self.table.get(self.hash)
+        best_move = None
+        if entry is not None:
+            entry_depth, value, flag, best_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                elif flag == UPPER:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+        if depth == 0:
+            return self.score if player == 0 else -self.score
+
+        moves = self._ordered(player, best_move)
+        if not moves:
+            return 0  # Board full: draw
+        original_alpha = alpha
+        best = -WIN_SCORE - 1
+        for square in moves:
+            if self.play(player, square):
+                score = WIN_SCORE - ply  # Sooner wins score higher
+            else:
+                score = -self.negamax(1 - player, depth - 1, -beta, -alpha, ply + 1)
+            self.undo(player, square)
+            if score > best:
+                best, best_move = score, square
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        flag = UPPER if best <= original_alpha else LOWER if best >= beta else EXACT
+        self.table[self.hash] = (depth, best, flag, best_move)
+        return best
+
+    def best_move(self, player, budget_s, max_depth=None):
+        """
+        Iterative deepening until the time budget runs out.
+        Returns:
+            int: The best move of the deepest completed search.
+        """
+        start = time.perf_counter()
+        self.deadline = start + budget_s
+        max_depth = max_depth or self.geometry.size
+        moves = self._ordered(player, None)
+        best = moves[0]
+        for depth in range(1, max_depth + 1):
+            try:
+                score = self.negamax(player, depth, -WIN_SCORE - 1, WIN_SCORE + 1, 0)
+            except _Timeout:
+                break
+            best = self.table[self.hash][3]
+            self.depth_reached = depth
+            if abs(score) >= WIN_SCORE - self.geometry.size:
+                break  # Forced result found; deeper searches cannot change it
+            if time.perf_counter() - start > budget_s / 2:
+                break  # The next depth would not finish in time
+        return best
+
+
+def choose_move(rows, cols, k, first_bits, second_bits, budget_s=0.5, max_depth=None):
+    """
+    Picks a move for the side to move.
+    Args:
+        rows, cols, k (int): Board shape and win length.
+        first_bits (int): Marks of the player who moved first.
+        second_bits (int): Marks of the other player.
+        budget_s (float): Time budget for the search in seconds.
+        max_depth (int): Optional cap on the search depth.
+    Returns:
+        tuple: (square, stats dict with "depth", "nodes" and "elapsed_s")
+    """
+    start = time.perf_counter()
+    search = Search(get_geometry(rows, cols, k), (first_bits, second_bits))
+    player = 0 if bin(first_bits).count("1") == bin(second_bits).count("1") else 1
+    square = search.best_move(player, budget_s, max_depth)
+    return square, {
+        "depth": search.depth_reached,
+        "nodes": search.nodes,
+        "elapsed_s": time.perf_counter() - start,
+    }
@@ -0,0 +1,44 @@
+import io
+
+from PIL import Image
+
+from filter_engine import normalize_mode
+from image_io import StripReader, is_mappable, reduce_strips
+
+# --- Screen-sized previews and full-resolution renders ---
+# Previews are decoded straight to roughly screen size: JPEG's DCT scaling
+# (Image.draft) skips most of the decode work and Image.reduce shrinks other
+# formats by whole-pixel box averaging before the final resize. Uncompressed
+# files opened by path are shrunk strip by strip from a memory map, so even
+# huge ones never decode in full. Full-resolution output is only rendered, in
+# the background, when a download is requested (image_io.render_png).
+
+PREVIEW_SIZE = (1200, 1200)
+
+
+def open_preview(source, max_size=PREVIEW_SIZE):
+    """
+    Decodes an upload at screen size.
+    Args:
+        source (bytes or str): The uploaded file's contents, or a path to it.
+        max_size (tuple): Bounding box of the preview in pixels.
+    Returns:
+        tuple: (preview image, full-resolution (width, height))
+    """
+    image = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+    full_size = image.size
+    if isinstance(source, str) and is_mappable(image):
+        image.close()
+        with StripReader(source) as reader:
+            return reduce_strips(reader, max_size), full_size
+    if image.format == "JPEG":
+        # Decode at 1/2, 1/4 or 1/8 scale, the smallest that still covers max_size
+        image.draft(image.mode, max_size)
+    image = normalize_mode(image)
+    factor = min(image.width // max_size[0], image.height // max_size[1])
+    if factor > 1:
+        image = image.reduce(factor)
+    image.thumbnail(max_size)
+    image.load()  # thumbnail() leaves small images lazy; read them before the file goes away
+    return image, full_size
+
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+# --- Response cache for the chatbot ---
+# An in-process LRU with TTL in front of an optional SQLite file that every
+# Streamlit session (and every server process) on the machine can share.
+
+
+def normalize_prompt(prompt):
+    """Collapses whitespace and case so trivially different prompts share a key."""
+    return " ".join(prompt.split()).casefold()
+
+
+def make_key(model_name, prompt, history=()):
+    """
+    Builds the cache key for a request.
+    Args:
+        model_name (str): Name of the model answering the prompt.
+        prompt (str): The user's message.
+        history (list): The conversation turns sent along with the prompt.
+    Returns:
+        str: A hex SHA-256 digest.
+    """
+    payload = json.dumps(
+        [model_name, normalize_prompt(prompt), list(history)],
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache whose entries expire after a TTL.
+    Values are stored as (response, latency) pairs.
+    """
+
+    def __init__(self, max_entries=512, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    On-disk cache tier shared across sessions and processes.
+    Each call opens and closes its own connection, so it is safe to use from any thread.
+    """
+
+    def __init__(self, path, ttl=24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self.evictions = 0
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                "latency REAL NOT NULL, expires REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        return None if entry is None else entry[1]
+
+    def get_entry(self, key):
+        """
+        Returns:
+            tuple: (expiry time, value), or None if the key is missing or expired.
+        """
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT response, latency, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[2] < time.time():
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.evictions += 1
+                return None
+            return row[2], (row[0], row[1])
+
+    def set(self, key, value):
+        response, latency = value
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, response, latency, time.time() + self.ttl),
+            )
+
+
+class ResponseCache:
+    """
+    Two-tier response cache with hit/miss/eviction counters.
+    Args:
+        max_entries (int): Size of the in-memory LRU tier.
+        ttl (float): Seconds an entry stays valid.
+        db_path (str): Optional SQLite file for the shared disk tier.
+    """
+
+    def __init__(self, max_entries=512, ttl=3600, db_path=None):
+        self.memory = LRUCache(max_entries, ttl)
+        self.disk = SQLiteCache(db_path, ttl) if db_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached response text, or None on a miss."""
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            entry = self.disk.get_entry(key)
+            if entry is not None:
+                expires, value = entry
+                # Keep the disk entry's expiry, so promoting it never extends its life
+                self.memory.set(key, value, ttl=expires - time.time())
+                with self._lock:
+                    self.disk_hits += 1
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # Each hit saves the latency the original API call took
+            self.saved_seconds += value[1]
+        return value[0]
+
+    def set(self, key, response, latency):
+        value = (response, latency)
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.memory.evictions + (self.disk.evictions if self.disk else 0),
+            "entries": len(self.memory),
+            "saved_seconds": self.saved_seconds,
+        }
+
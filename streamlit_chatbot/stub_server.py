@@ -0,0 +1,161 @@
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from async_backend import AsyncBackend, RateLimitError
+
+# --- Local stub of the Gemini generateContent endpoint ---
+# Answers after a simulated latency and returns 429 when too many requests are
+# in flight or at a configurable random rate, so the async backend can be
+# exercised without network access or an API key.
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with server.lock:
+            server.requests += 1
+            rejected = server.inflight >= server.capacity or random.random() < server.error_rate
+            if rejected:
+                server.rejected += 1
+            else:
+                server.inflight += 1
+        if rejected:
+            self._send(429, {"error": {"code": 429, "message": "Resource has been exhausted"}})
+            return
+        try:
+            time.sleep(random.uniform(0.5, 1.5) * server.latency)
+            contents = json.loads(body)["contents"]
+            text = f"Stub reply to: {contents[-1]['parts'][-1]['text']}"
+            self._send(200, {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]})
+        finally:
+            with server.lock:
+                server.inflight -= 1
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Keep the console quiet under load
+
+
+def start_stub_server(latency=0.3, error_rate=0.05, capacity=16, port=0):
+    """
+    Starts the stub server in a daemon thread.
+    Args:
+        latency (float): Mean seconds per successful request.
+        error_rate (float): Fraction of requests answered with 429 at random.
+        capacity (int): Concurrent requests served before answering 429.
+        port (int): Port to listen on (0 picks a free one).
+    Returns:
+        ThreadingHTTPServer: The running server; its URL is in `server.url`.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.error_rate = error_rate
+    server.capacity = capacity
+    server.lock = threading.Lock()
+    server.inflight = 0
+    server.requests = 0
+    server.rejected = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubClient:
+    """Client for the stub server with the same async call as genai.GenerativeModel."""
+
+    def __init__(self, url, model_name="gemini-1.5-flash"):
+        self.endpoint = f"{url}/v1beta/models/{model_name}:generateContent"
+
+    def _post(self, contents):
+        if isinstance(contents, str):
+            contents = [{"role": "user", "parts": [contents]}]
+        payload = {"contents": [
+            {"role": c["role"], "parts": [{"text": p} for p in c["parts"]]} for c in contents
+        ]}
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                data = json.loads(response.read())
+        except urllib.error.HTTPError as exc:
+            if exc.code == 429:
+                raise RateLimitError(exc.reason) from exc
+            raise
+        return StubResponse(data["candidates"][0]["content"]["parts"][0]["text"])
+
+    async def generate_content_async(self, contents):
+        return await asyncio.to_thread(self._post, contents)
+
+
+async def run_load(backend, requests, distinct):
+    """
+    Fires `requests` concurrent prompts drawn from `distinct` different ones.
+    Returns:
+        list: Per request, its latency in seconds or the exception it failed with.
+    """
+    async def one(i):
+        prompt = f"prompt {i % distinct}"
+        start = time.perf_counter()
+        try:
+            await backend.generate(prompt, key=prompt)
+        except Exception as exc:  # Gave up after the last retry, or an error not worth retrying
+            return exc
+        return time.perf_counter() - start
+
+    return await asyncio.gather(*(one(i) for i in range(requests)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive the async backend against a local stub server.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=50, help="Number of different prompts")
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--capacity", type=int, default=16)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=20.0)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.latency, args.error_rate, args.capacity)
+    backend = AsyncBackend(lambda: StubClient(server.url), pool_size=args.pool_size,
+                           rate=args.rate, burst=args.pool_size, base_delay=0.1)
+    start = time.perf_counter()
+    results = asyncio.run(run_load(backend, args.requests, args.distinct))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(r for r in results if not isinstance(r, Exception))
+    failures = Counter(type(r).__name__ for r in results if isinstance(r, Exception))
+
+    print(f"{args.requests} requests in {elapsed:.2f}s ({args.requests / elapsed:.1f} req/s), "
+          f"{sum(failures.values())} failed" + "".join(f", {count} {name}" for name, count in failures.items()))
+    if latencies:
+        print(f"p50 {latencies[len(latencies) // 2]:.3f}s  p99 {latencies[int(len(latencies) * 0.99)]:.3f}s")
+    else:
+        print("no request succeeded")
+    print(f"backend: {backend.stats}")
+    print(f"server: {server.requests} requests, {server.rejected} answered 429")
+    server.shutdown()
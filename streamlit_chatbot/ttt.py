@@ -1,132 +1,191 @@
 import streamlit as st
+import multiprocessing
 import random
-import time # Used for a small delay to make AI's move more noticeable
+import os
+from concurrent.futures import ProcessPoolExecutor
+import mnk_engine
+import ttt_engine
 
 # --- Game Logic Functions (Adapted from previous AI example) ---
 
-def init_board():
-    """Initializes a new empty Tic-Tac-Toe board."""
-    return [' '] * 9
+# Board presets: (rows, columns, marks in a row to win)
+BOARD_PRESETS = {
+    "3x3, 3 in a row": (3, 3, 3),
+    "4x4, 4 in a row": (4, 4, 4),
+    "5x5, 4 in a row": (5, 5, 4),
+    "7x7, 5 in a row": (7, 7, 5),
+}
+# Time the AI may think on boards larger than 3x3 (3x3 is a table lookup)
+AI_BUDGET_S = float(os.environ.get("TTT_MOVE_BUDGET_MS", 500)) / 1000
+# The AI's mark fades in after this long, in the browser, so its move is noticeable
+AI_REVEAL_S = 0.8
+AI_POLL_S = 0.25
+
+def init_board(rows=3, cols=3, k=3):
+    """
+    Initializes a new empty board.
+    The board is one integer bitboard per player, bit i set for each square i
+    (row-major) they hold, plus the board's shape.
+    """
+    return {'X': 0, 'O': 0, 'rows': rows, 'cols': cols, 'k': k}
+
+def is_classic(board):
+    return (board['rows'], board['cols'], board['k']) == (3, 3, 3)
+
+def geometry(board):
+    return mnk_engine.get_geometry(board['rows'], board['cols'], board['k'])
+
+def square_at(board, index):
+    """Returns 'X', 'O' or ' ' for the square at `index`."""
+    bit = 1 << index
+    if board['X'] & bit:
+        return 'X'
+    if board['O'] & bit:
+        return 'O'
+    return ' '
+
+def play(board, index, player):
+    """Marks square `index` for `player`."""
+    board[player] |= 1 << index
 
 def check_win(board, player):
     """
     Checks if the given player has won the game.
     Args:
-        board (list): The current state of the Tic-Tac-Toe board.
+        board (dict): The current state of the board.
         player (str): The player's symbol ('X' or 'O').
     Returns:
         bool: True if the player has won, False otherwise.
     """
-    win_conditions = [
-        [0, 1, 2], [3, 4, 5], [6, 7, 8], # Rows
-        [0, 3, 6], [1, 4, 7], [2, 5, 8], # Columns
-        [0, 4, 8], [2, 4, 6]             # Diagonals
-    ]
-    for condition in win_conditions:
-        if all(board[i] == player for i in condition):
-            return True
-    return False
+    if is_classic(board):
+        return ttt_engine.is_win(board[player])
+    return geometry(board).is_win(board[player])
 
 def check_draw(board):
     """
     Checks if the game is a draw (all squares filled, no winner).
     Args:
-        board (list): The current state of the Tic-Tac-Toe board.
+        board (dict): The current state of the board.
     Returns:
         bool: True if it's a draw, False otherwise.
     """
-    return all(square != ' ' for square in board)
+    if is_classic(board):
+        return ttt_engine.is_full(board['X'], board['O'])
+    return board['X'] | board['O'] == geometry(board).full
 
 def get_available_moves(board):
     """
     Returns a list of indices of empty squares on the board.
     Args:
-        board (list): The current state of the Tic-Tac-Toe board.
+        board (dict): The current state of the Tic-Tac-Toe board.
     Returns:
         list: A list of available move indices.
     """
-    return [i for i, spot in enumerate(board) if spot == ' ']
+    full = (1 << board['rows'] * board['cols']) - 1
+    return ttt_engine.squares(full & ~(board['X'] | board['O']))
 
 def ai_move(board, ai_player, human_player):
     """
-    Determines the AI's best move using a simple strategy.
+    Determines the AI's move: perfect play from the solved table (ttt_engine) on
+    3x3, otherwise a search limited to AI_BUDGET_S (mnk_engine).
     Args:
-        board (list): The current state of the Tic-Tac-Toe board.
+        board (dict): The current state of the Tic-Tac-Toe board.
         ai_player (str): The AI's symbol ('X' or 'O').
         human_player (str): The human player's symbol ('X' or 'O').
     Returns:
-        int: The index of the square the AI chooses.
+        int: The index of the square the AI chooses, or -1 if the board is full.
     """
-    available_moves = get_available_moves(board)
-
-    # 1. Check if AI can win in the next move
-    for move in available_moves:
-        temp_board = list(board) # Create a copy to simulate
-        temp_board[move] = ai_player
-        if check_win(temp_board, ai_player):
-            return move
-
-    # 2. Check if human can win in the next move, and block them
-    for move in available_moves:
-        temp_board = list(board) # Create a copy to simulate
-        temp_board[move] = human_player
-        if check_win(temp_board, human_player):
-            return move
-
-    # 3. Try to take the center (most strategic spot)
-    if 4 in available_moves:
-        return 4
-
-    # 4. Try to take a corner
-    corners = [0, 2, 6, 8]
-    random.shuffle(corners) # Randomize corner choice
-    for move in corners:
-        if move in available_moves:
-            return move
-
-    # 5. Take any available side spot
-    sides = [1, 3, 5, 7]
-    random.shuffle(sides) # Randomize side choice
-    for move in sides:
-        if move in available_moves:
-            return move
-
-    # Fallback: if somehow no strategic move, pick a random available move
-    # This should only happen if the board is full and no other rule applies
-    if available_moves:
-        return random.choice(available_moves)
-    return -1 # Should not happen in a valid game state where moves are available
+    if check_draw(board):
+        return -1
+    if not is_classic(board):
+        move, _ = mnk_engine.choose_move(board['rows'], board['cols'], board['k'],
+                                         board['X'], board['O'], AI_BUDGET_S)
+        return move
+    # X always moves first, so the engine can tell whose turn it is from the counts
+    moves, _ = ttt_engine.best_moves(board['X'], board['O'])
+    # Several squares are often equally good; pick one at random so games vary
+    return random.choice(ttt_engine.squares(moves))
 
 
 # --- Streamlit Application Logic ---
 
-# Initialize session state for the game if it doesn't exist
-if 'game' not in st.session_state:
-    st.session_state.game = {
-        'board': init_board(),
+def new_game(shape=(3, 3, 3)):
+    """Returns the session state of a new game on a board of the given (rows, cols, k) shape."""
+    return {
+        'board': init_board(*shape),
         'current_player': 'X', # Human starts as 'X'
         'human_player': 'X',
         'ai_player': 'O',
         'game_over': False,
         'winner': None,
         'message': "Your turn (X)!",
-        'ai_thinking': False # Flag to indicate AI is making a move
+        'ai_thinking': False, # Flag to indicate AI is making a move
+        'last_ai_move': None
     }
 
+# Initialize session state for the game if it doesn't exist
+if 'game' not in st.session_state:
+    st.session_state.game = new_game()
+
 def reset_game():
-    """Resets the game state in session_state."""
-    st.session_state.game = {
-        'board': init_board(),
-        'current_player': 'X',
-        'human_player': 'X',
-        'ai_player': 'O',
-        'game_over': False,
-        'winner': None,
-        'message': "Your turn (X)!",
-        'ai_thinking': False
-    }
+    """Resets the game state in session_state, keeping the board shape."""
+    board = st.session_state.game['board']
+    st.session_state.game = new_game((board['rows'], board['cols'], board['k']))
     st.rerun() # Rerun the app to reflect the reset state
 
+@st.cache_resource
+def get_ai_pool():
+    """Worker processes shared by every game, so searches never run on a script thread."""
+    workers = int(os.environ.get("TTT_AI_WORKERS", 0)) or os.cpu_count() or 1
+    # spawn: forking a threaded server (Streamlit) is not safe
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+
+def start_ai_turn(game):
+    """
+    Starts the AI's move. 3x3 moves are a table lookup and are made at once;
+    searches on bigger boards go to the worker pool and are picked up by a later rerun.
+    """
+    board = game['board']
+    if is_classic(board):
+        finish_ai_turn(game, ai_move(board, game['ai_player'], game['human_player']))
+    else:
+        st.session_state.ai_future = get_ai_pool().submit(
+            mnk_engine.choose_move, board['rows'], board['cols'], board['k'],
+            board['X'], board['O'], AI_BUDGET_S
+        )
+
+def finish_ai_turn(game, ai_move_index):
+    """Plays the AI's move and checks for a win or draw."""
+    if ai_move_index != -1: # Ensure a valid move was returned
+        play(game['board'], ai_move_index, game['ai_player'])
+        game['last_ai_move'] = ai_move_index
+
+        # Check for AI win or draw after its move
+        if check_win(game['board'], game['ai_player']):
+            game['winner'] = game['ai_player']
+            game['game_over'] = True
+            game['message'] = f"🤖 AI ({game['ai_player']}) wins! Better luck next time!"
+        elif check_draw(game['board']):
+            game['winner'] = "Draw"
+            game['game_over'] = True
+            game['message'] = "It's a draw!"
+        else:
+            game['current_player'] = game['human_player']
+            game['message'] = "Your turn (X)!"
+
+    game['ai_thinking'] = False # Reset AI thinking flag
+
+@st.fragment(run_every=AI_POLL_S)
+def wait_for_ai():
+    """Checks on the AI's search without holding a script thread; reruns the page once it has moved."""
+    future = st.session_state.get('ai_future')
+    if future is None or future.done():
+        st.rerun()
+
+def change_board():
+    """Starts a new game when a different board preset is picked."""
+    st.session_state.game = new_game(BOARD_PRESETS[st.session_state.board_preset])
+
 def handle_click(index):
     """
     Handles a click on a board square.
@@ -135,11 +194,11 @@ def handle_click(index):
     game = st.session_state.game
 
     # Do nothing if game is over, square is already taken, or AI is thinking
-    if game['game_over'] or game['board'][index] != ' ' or game['ai_thinking']:
+    if game['game_over'] or square_at(game['board'], index) != ' ' or game['ai_thinking']:
         return
 
     # Human's move
-    game['board'][index] = game['human_player']
+    play(game['board'], index, game['human_player'])
     game['message'] = "" # Clear previous message
 
     # Check for human win or draw
@@ -156,15 +215,29 @@ def handle_click(index):
         game['current_player'] = game['ai_player']
         game['message'] = "AI (O) is thinking..."
         game['ai_thinking'] = True # Set flag for AI turn
-        # Streamlit will rerun, and the AI move will be handled in the main loop
-        st.rerun()
+        start_ai_turn(game)
+
+# --- AI Turn Handling ---
+# Searches on bigger boards run on the worker pool. Each rerun (triggered by the
+# wait_for_ai fragment below) checks whether the move is ready and plays it
+# before the board is drawn.
+game = st.session_state.game
+if game['ai_thinking'] and not game['game_over']:
+    future = st.session_state.get('ai_future')
+    if future is None: # The worker's result was lost, e.g. the session was restored
+        start_ai_turn(game)
+    elif future.done():
+        st.session_state.ai_future = None
+        finish_ai_turn(game, future.result()[0])
 
 # --- Streamlit UI ---
 
 st.set_page_config(layout="centered", page_title="Tic-Tac-Toe AI")
 
 st.title("✖️⭕ Tic-Tac-Toe AI 🧠")
-st.write("Play against a simple AI opponent!")
+st.write("Play against an AI that never loses on 3x3, and thinks hard on bigger boards!")
+
+st.sidebar.selectbox("Board", list(BOARD_PRESETS), key="board_preset", on_change=change_board)
 
 # Display game status message
 if st.session_state.game['message']:
@@ -179,17 +252,17 @@ if st.session_state.game['message']:
 board = st.session_state.game['board']
 game_over = st.session_state.game['game_over']
 
-# Use columns for a 3x3 grid layout
-for i in range(3):
-    cols = st.columns(3)
-    for j in range(3):
-        index = i * 3 + j
+# Use columns for the grid layout
+for i in range(board['rows']):
+    cols = st.columns(board['cols'])
+    for j in range(board['cols']):
+        index = i * board['cols'] + j
         with cols[j]:
             # Display the content of the square or an empty string if not played
-            square_content = board[index] if board[index] != ' ' else ' '
+            square_content = square_at(board, index)
             
             # Disable buttons if game is over or square is taken
-            disabled = game_over or board[index] != ' ' or st.session_state.game['ai_thinking']
+            disabled = game_over or square_content != ' ' or st.session_state.game['ai_thinking']
 
             # Use a larger font size for the button text
             button_style = f"font-size: 3em; height: 100px; width: 100%;"
@@ -213,37 +286,17 @@ for i in range(3):
             ):
                 pass # The on_click handler does the work
 
-# --- AI Turn Handling ---
-# This block runs after the human's click has been processed and the UI updated
-# (or after a reset). If it's AI's turn and game is not over, AI makes a move.
-if st.session_state.game['ai_thinking'] and not st.session_state.game['game_over']:
-    # Add a small delay to simulate thinking time for the AI
-    time.sleep(0.8) # Adjust this value for faster/slower AI response
-
-    ai_move_index = ai_move(
-        st.session_state.game['board'],
-        st.session_state.game['ai_player'],
-        st.session_state.game['human_player']
-    )
-
-    if ai_move_index != -1: # Ensure a valid move was returned
-        st.session_state.game['board'][ai_move_index] = st.session_state.game['ai_player']
+if game['ai_thinking']:
+    wait_for_ai()
 
-        # Check for AI win or draw after its move
-        if check_win(st.session_state.game['board'], st.session_state.game['ai_player']):
-            st.session_state.game['winner'] = st.session_state.game['ai_player']
-            st.session_state.game['game_over'] = True
-            st.session_state.game['message'] = f"🤖 AI ({st.session_state.game['ai_player']}) wins! Better luck next time!"
-        elif check_draw(st.session_state.game['board']):
-            st.session_state.game['winner'] = "Draw"
-            st.session_state.game['game_over'] = True
-            st.session_state.game['message'] = "It's a draw!"
-        else:
-            st.session_state.game['current_player'] = st.session_state.game['human_player']
-            st.session_state.game['message'] = "Your turn (X)!"
-
-    st.session_state.game['ai_thinking'] = False # Reset AI thinking flag
-    st.rerun() # Rerun to show AI's move and update messages
+if game.get('last_ai_move') is not None:
+    # Delay showing the AI's latest mark in the browser instead of sleeping on the server
+    st.markdown(
+        f"<style>.st-key-square_{game['last_ai_move']} button p "
+        f"{{animation: ai-reveal {AI_REVEAL_S}s step-end}} "
+        f"@keyframes ai-reveal {{from {{opacity: 0}} to {{opacity: 1}}}}</style>",
+        unsafe_allow_html=True,
+    )
 
 # Reset button
 if st.session_state.game['game_over']:
@@ -256,6 +309,7 @@ with st.expander("ℹ️ How to Play"):
     1.  You are **X** and the AI is **O**.
     2.  Click on an empty square to place your **X**.
     3.  The AI will then make its move.
-    4.  The goal is to get three of your marks in a row, column, or diagonal.
+    4.  The goal is to get enough of your marks in a row, column, or diagonal:
+        three on the classic board, more on the bigger ones (pick one in the sidebar).
     5.  If all squares are filled and no one wins, it's a draw!
     """)
\ No newline at end of file
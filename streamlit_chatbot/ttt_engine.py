@@ -0,0 +1,257 @@
+import argparse
+import os
+import sys
+from array import array
+
+# --- Solved tic-tac-toe ---
+# A position is two 9-bit integers, one per player, with bit i set for square i
+# (row-major, 0 is top left). Every position reachable from the empty board is
+# solved once by negamax with alpha-beta pruning. Positions are stored only in
+# canonical form (the smallest key under the board's 8 rotations and
+# reflections), so the whole game fits in a few hundred table entries. A move
+# is then a table lookup plus a symmetry transform.
+#
+# Scores are from the point of view of the side to move: 0 for a draw, and
+# (empty squares + 1) for a win, so quicker wins and slower losses score higher.
+
+SIZE = 3
+FULL = 0x1FF
+
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,  # Rows
+    0b001001001, 0b010010010, 0b100100100,  # Columns
+    0b100010001, 0b001010100,               # Diagonals
+)
+
+# Center first, then corners, then sides: good moves early mean more cut-offs
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+TABLE_MAGIC = b"TTT1"
+
+_POPCOUNT = [bin(i).count("1") for i in range(FULL + 1)]
+# _WINNING[bits] is True when bits contain a complete line: one lookup per win check
+_WINNING = [any(bits & mask == mask for mask in WIN_MASKS) for bits in range(FULL + 1)]
+
+
+def _symmetries():
+    """The 8 rotations and reflections of the board, as square permutations."""
+    transforms = [
+        lambda r, c: (r, c),
+        lambda r, c: (c, 2 - r),
+        lambda r, c: (2 - r, 2 - c),
+        lambda r, c: (2 - c, r),
+        lambda r, c: (r, 2 - c),
+        lambda r, c: (2 - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (2 - c, 2 - r),
+    ]
+    perms = []
+    for transform in transforms:
+        perm = [0] * 9
+        for i in range(9):
+            r, c = transform(*divmod(i, SIZE))
+            perm[i] = r * SIZE + c
+        perms.append(perm)
+    return perms
+
+
+def _mask_tables(perms):
+    """For each permutation, a 512-entry table mapping a bitmask to its image."""
+    tables = []
+    for perm in perms:
+        table = [0] * (FULL + 1)
+        for mask in range(FULL + 1):
+            image = 0
+            for i in range(9):
+                if mask >> i & 1:
+                    image |= 1 << perm[i]
+            table[mask] = image
+        tables.append(table)
+    return tables
+
+
+_PERMS = _symmetries()
+_TRANSFORM = _mask_tables(_PERMS)
+_INVERSE = _mask_tables([[perm.index(i) for i in range(9)] for perm in _PERMS])
+
+_table = None
+
+
+def is_win(bits):
+    """True if a player's bits contain a complete line."""
+    return _WINNING[bits]
+
+
+def is_full(x_bits, o_bits):
+    return _POPCOUNT[x_bits | o_bits] == 9
+
+
+def free_squares(x_bits, o_bits):
+    """Bitmask of the empty squares."""
+    return FULL & ~(x_bits | o_bits)
+
+
+def canonical(x_bits, o_bits):
+    """
+    Reduces a position to its canonical form.
+    Returns:
+        tuple: (key, symmetry). key packs the transformed X bits in the low 9 bits
+            and O bits in the next 9; symmetry is the index of the transform used.
+    """
+    best_key, best_symmetry = None, 0
+    for symmetry, transform in enumerate(_TRANSFORM):
+        key = transform[x_bits] | transform[o_bits] << 9
+        if best_key is None or key < best_key:
+            best_key, best_symmetry = key, symmetry
+    return best_key, best_symmetry
+
+
+def _negamax(me, opp, alpha, beta, cache):
+    """Exact score for the side to move when it lies inside (alpha, beta), otherwise a bound."""
+    empty = 9 - _POPCOUNT[me | opp]
+    if is_win(opp):
+        return -(empty + 1)
+    if not empty:
+        return 0
+
+    key = canonical(me, opp)[0]
+    entry = cache.get(key)
+    if entry is not None:
+        value, flag = entry
+        if flag == 0:
+            return value
+        if flag > 0:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+
+    original_alpha = alpha
+    best = -10
+    occupied = me | opp
+    for square in MOVE_ORDER:
+        bit = 1 << square
+        if occupied & bit:
+            continue
+        score = -_negamax(opp, me | bit, -beta, -alpha, cache)
+        if score > best:
+            best = score
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+
+    # 0: exact, 1: lower bound (beta cut-off), -1: upper bound (nothing beat alpha)
+    flag = -1 if best <= original_alpha else 1 if best >= beta else 0
+    cache[key] = (best, flag)
+    return best
+
+
+def solve():
+    """
+    Solves every non-terminal position reachable from the empty board.
+    Returns:
+        dict: Canonical key -> (score, bitmask of every optimal move), both for the side to move.
+    """
+    table = {}
+    cache = {}
+    seen = set()
+    stack = [(0, 0)]
+    while stack:
+        x_bits, o_bits = stack.pop()
+        key = canonical(x_bits, o_bits)[0]
+        if key in seen:
+            continue
+        seen.add(key)
+        if is_win(x_bits) or is_win(o_bits) or x_bits | o_bits == FULL:
+            continue
+
+        # The canonical orientation is what gets stored, so solve that one
+        x_bits, o_bits = key & FULL, key >> 9
+        occupied = x_bits | o_bits
+        x_to_move = _POPCOUNT[x_bits] == _POPCOUNT[o_bits]
+        me, opp = (x_bits, o_bits) if x_to_move else (o_bits, x_bits)
+        best, moves = -10, 0
+        for square in range(9):
+            bit = 1 << square
+            if occupied & bit:
+                continue
+            score = -_negamax(opp, me | bit, -10, 10, cache)
+            if score > best:
+                best, moves = score, bit
+            elif score == best:
+                moves |= bit
+            stack.append((x_bits | bit, o_bits) if x_to_move else (x_bits, o_bits | bit))
+        table[key] = (best, moves)
+    return table
+
+
+def save_table(table, path):
+    """Writes the table as one 32-bit word per position: key (18 bits), moves (9), score + 16 (5)."""
+    words = array("I", sorted(key | moves << 18 | (score + 16) << 27 for key, (score, moves) in table.items()))
+    if sys.byteorder != "little":
+        words.byteswap()
+    with open(path, "wb") as f:
+        f.write(TABLE_MAGIC)
+        f.write(words.tobytes())
+
+
+def load_table(path):
+    with open(path, "rb") as f:
+        if f.read(len(TABLE_MAGIC)) != TABLE_MAGIC:
+            raise ValueError(f"Not a tic-tac-toe table: {path}")
+        words = array("I")
+        words.frombytes(f.read())
+    if sys.byteorder != "little":
+        words.byteswap()
+    return {word & 0x3FFFF: ((word >> 27) - 16, word >> 18 & FULL) for word in words}
+
+
+def get_table(path=None):
+    """
+    Returns the solved table, built once per process.
+    Args:
+        path (str): Optional file to load the table from. If it does not exist,
+            the table is solved and written there for the next process.
+    """
+    global _table
+    if _table is None:
+        if path and os.path.exists(path):
+            _table = load_table(path)
+        else:
+            _table = solve()
+            if path:
+                save_table(_table, path)
+    return _table
+
+
+def best_moves(x_bits, o_bits, table=None):
+    """
+    Looks up a position.
+    Returns:
+        tuple: (bitmask of every optimal move, score for the side to move)
+    """
+    table = table or get_table(os.environ.get("TTT_TABLE_PATH"))
+    key, symmetry = canonical(x_bits, o_bits)
+    score, moves = table[key]
+    return _INVERSE[symmetry][moves], score
+
+
+def squares(mask):
+    """Indices of the set bits of a mask, lowest first."""
+    indices = []
+    while mask:
+        bit = mask & -mask  # Lowest set bit
+        indices.append(bit.bit_length() - 1)
+        mask ^= bit
+    return indices
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve tic-tac-toe and write the move table.")
+    parser.add_argument("output", help="Table file to write (point TTT_TABLE_PATH at it)")
+    args = parser.parse_args()
+    solved = solve()
+    save_table(solved, args.output)
+    print(f"Wrote {len(solved)} positions ({os.path.getsize(args.output)} bytes) to {args.output}")